@@ -2,18 +2,463 @@
 """
 @author: Joep
 """
-import numpy as np
-from pandas import DataFrame
+import csv
+import io
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+class _LazyModule:
+    """
+    Placeholder for a module which is imported when one of its attributes is first used. Importing numpy and pandas
+    takes the better part of a second, which is only spent by the converters that need them (e.g. not by plain CSV
+    conversions). On first use, the placeholder replaces itself by the module in the globals of this module.
+    """
+    def __init__(self, name, alias):
+        self.__name = name
+        self.__alias = alias
+
+    def __getattr__(self, attr):
+        import importlib
+        module = importlib.import_module(self.__name)
+        globals()[self.__alias] = module
+        return getattr(module, attr)
+
+np = _LazyModule("numpy", "np")
+
+def _is_array(obj):
+    """
+    Returns whether `obj` is a numpy array, without importing numpy: if it has not been imported, `obj` is no array.
+    """
+    return "numpy" in sys.modules and isinstance(obj, sys.modules["numpy"].ndarray)
+
 def LaTeXTable(data, **kwargs):
     if(type(data) is str):
+        extension = os.path.splitext(data)[1].lower()
+        if(extension in ARROW_EXTENSIONS):
+            return ArrowToLaTeX(data, **kwargs)
+        if(extension in (".npy", ".npz")):
+            return NpyToLaTeX(data, **kwargs)
         return CSVToLaTeX(data, **kwargs)
-    elif(type(data) is np.ndarray):
+    elif("numpy" in sys.modules and type(data) is sys.modules["numpy"].ndarray):
         return MatrixToLaTeX(data, **kwargs)
-    elif(type(data) is DataFrame):
+    elif("pandas" in sys.modules and type(data) is sys.modules["pandas"].DataFrame):
         return DataFrameToLaTeX(data, **kwargs)
-    elif(type(data) is list):
+    elif(type(data).__module__.split(".")[0] == "pyarrow"):
+        return ArrowToLaTeX(data, **kwargs)
+    elif(type(data) in (list, tuple) or hasattr(data, "__next__")):
         return ListToLaTeX(data, **kwargs)
 
+#the file extensions of `ArrowToLaTeX`
+ARROW_EXTENSIONS = (".parquet", ".pq", ".feather", ".arrow", ".ipc", ".arrows")
+
+class RenderStats(dict):
+    """
+    Statistics of the last rendering of a table, see `__ToLaTeX__.stats`. As a dictionary, it contains the number of 'rows',
+    the elapsed 'time' and the 'rows_per_second'. If profiling is enabled (see `set_profiling`), `stages` maps the
+    stages 'read', 'format', 'join', 'lines' and 'write' (and 'aggregate' and 'style' if footers or styles are set) to their
+    total time and number of calls, and `columns` maps
+    the index of each column in the table to the time spent in its formatter and the number of formatted cells.
+    """
+    def __init__(self, headers=None, **kwargs):
+        super().__init__(**kwargs)
+        self.headers = headers
+        self.stages = dict()
+        self.columns = dict()
+        
+    def add(self, stage, seconds, calls=1):
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+    
+    def add_column(self, column, seconds, cells):
+        entry = self.columns.setdefault(column, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += cells
+        self.add("format", seconds)
+    
+    def finish(self, rows, seconds):
+        self.update(rows=rows, time=seconds, rows_per_second=rows/seconds if seconds>0 else float("inf"))
+    
+    def slowest_columns(self, n=None):
+        """
+        Returns the `n` (default: all) columns with the slowest formatters as a list of tuples
+        (index, header, seconds, cells), sorted by the time spent in the formatter.
+        """
+        columns = sorted(self.columns.items(), key=lambda item: -item[1][0])[:n]
+        return [(i, self.headers[i] if self.headers is not None and i < len(self.headers) else None, seconds, cells)
+                for i, (seconds, cells) in columns]
+    
+    def summary(self):
+        """
+        Returns a human readable summary of the statistics.
+        """
+        lines = ["{:d} rows in {:.3f} s ({:,.0f} rows/s)".format(self.get("rows", 0), self.get("time", 0.0), self.get("rows_per_second", 0.0))]
+        for stage, (seconds, calls) in self.stages.items():
+            lines.append("  {:<8s} {:>9.3f} s {:>9d} calls".format(stage, seconds, calls))
+        for i, header, seconds, cells in self.slowest_columns():
+            lines.append("  column {:d}{} {:>9.3f} s {:>9.3f} us/cell".format(i, "" if header is None else " (" + str(header) + ")",
+                                                                          seconds, 1e6*seconds/max(1, cells)))
+        return "\n".join(lines)
+
+#translation table which escapes the characters with a special meaning in LaTeX
+LATEX_ESCAPES = str.maketrans({"&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_", "{": r"\{", "}": r"\}",
+                               "~": r"\textasciitilde{}", "^": r"\textasciicircum{}", "\\": r"\textbackslash{}"})
+
+#the same escapes as replacements, which are much faster than a translation on long strings. The backslashes
+#are replaced by a placeholder first, such that the braces of \textbackslash{} are not escaped
+_LATEX_REPLACEMENTS = [("\\", "\x01"), ("{", r"\{"), ("}", r"\}"), ("&", r"\&"), ("%", r"\%"), ("$", r"\$"), ("#", r"\#"),
+                       ("_", r"\_"), ("~", r"\textasciitilde{}"), ("^", r"\textasciicircum{}"), ("\x01", r"\textbackslash{}")]
+
+def _escape_math(cell):
+    """
+    Escapes the text outside of the math parts (between dollar signs) of `cell`.
+    """
+    parts = cell.split("$")
+    if(len(parts)%2 == 0):
+        return cell.translate(LATEX_ESCAPES) #unbalanced dollar signs, not a formula
+    parts[::2] = [part.translate(LATEX_ESCAPES) for part in parts[::2]]
+    return "$".join(parts)
+
+def _escape_cells(cells, math=True):
+    """
+    Escapes the LaTeX special characters in the list of strings `cells`, which are joined and escaped at once.
+    If `math` is True, formulas between dollar signs, such as "$x_{i}$", are left as they are.
+    """
+    text = "\x00".join(cells)
+    if("\x01" in text):
+        escaped = [cell.translate(LATEX_ESCAPES) for cell in cells]
+    else:
+        escaped = text
+        for char, replacement in _LATEX_REPLACEMENTS:
+            escaped = escaped.replace(char, replacement)
+        escaped = escaped.split("\x00")
+        if(len(escaped) != len(cells)):
+            escaped = [cell.translate(LATEX_ESCAPES) for cell in cells] #the separator occurs in the cells
+    if(math and "$" in text):
+        for i, cell in enumerate(cells):
+            if("$" in cell):
+                escaped[i] = _escape_math(cell)
+    return escaped
+
+class Format:
+    r"""
+    Declarative formatter of a column, which can be used wherever a formatter is accepted (see `set_formatters`).
+    A format is compiled once into a specialized function, or, if it only consists of the numeric options
+    `precision`, `scientific` and `thousands`, into a format specification which is applied to whole columns at once.
+
+    Parameters
+    ----------
+    precision : int, optional
+        number of decimals (or significant decimals in scientific notation).
+    scientific : bool, optional
+        use scientific notation, e.g. 1.23e+04.
+    percent : bool, optional
+        multiply the value by 100 and append `\%`.
+    thousands : bool or str, optional
+        group the thousands. If True the separator is ',', a string such as r"\," is used as separator instead.
+    escape : bool, optional
+        escape the characters with a special meaning in LaTeX, such as '&' and '_'.
+    bold_if : function, optional
+        a predicate on the value (as a number if one of the numeric options is set), the cell is printed in bold if it is True.
+    memo : int, optional
+        size of a cache of the formatted values, which is useful for columns with many repeated values.
+        The values have to be hashable.
+    """
+    def __init__(self, precision=None, scientific=False, percent=False, thousands=False, escape=False, bold_if=None, memo=None):
+        self.precision = precision
+        self.scientific = scientific
+        self.percent = percent
+        self.thousands = thousands
+        self.escape = escape
+        self.bold_if = bold_if
+        self.memo = memo
+        self._compiled = None
+        self._function = None
+
+    def __repr__(self):
+        options = ["{}={!r}".format(k, v) for k, v in vars(self).items() if not k.startswith("_") and v not in (None, False)]
+        return "Format(" + ", ".join(options) + ")"
+
+    def __call__(self, value):
+        if(self._function is None):
+            self._function = self.__function__()
+        return self._function(value)
+
+    def spec(self):
+        """
+        Returns the format specification of the numeric options (e.g. ',.2f'), or None if none of them is set.
+        """
+        if(self.precision is None and not (self.scientific or self.percent or self.thousands)):
+            return None
+        spec = "," if self.thousands else ""
+        if(self.precision is not None):
+            spec += "." + str(int(self.precision))
+        if(self.scientific):
+            spec += "e"
+        elif(self.percent):
+            spec += "%"
+        elif(self.precision is not None):
+            spec += "f"
+        return spec
+
+    def compile(self):
+        """
+        Returns a format specification such as '{:,.2f}' if the format can be applied to whole columns at once,
+        and a function which formats a single value otherwise.
+        """
+        if(self._compiled is None):
+            spec = self.spec()
+            if(spec is not None and not (self.percent or self.escape or self.bold_if or self.memo) and self.thousands in (False, True, ",")):
+                self._compiled = "{:" + spec + "}"
+            else:
+                self._compiled = self.__function__()
+        return self._compiled
+
+    def __function__(self):
+        """
+        Builds the function for this format out of the steps that are enabled, such that no options are checked per value.
+        """
+        spec = self.spec()
+        function = str if spec is None else ("{:" + spec + "}").format
+        if(self.escape):
+            #also escapes the % of percentages
+            function = lambda v, f=function: f(v).translate(LATEX_ESCAPES)
+        elif(self.percent):
+            function = lambda v, f=function: f(v).replace("%", r"\%")
+        if(isinstance(self.thousands, str) and self.thousands != ","):
+            function = lambda v, f=function, sep=self.thousands: f(v).replace(",", sep)
+        if(self.bold_if is not None):
+            def function(v, f=function, predicate=self.bold_if):
+                s = f(v)
+                return r"\textbf{" + s + "}" if predicate(v) else s
+        if(spec is not None):
+            #numeric formats receive strings from csv files
+            function = lambda v, f=function: f(float(v)) if isinstance(v, str) else f(v)
+        if(self.memo):
+            import functools
+            function = functools.lru_cache(maxsize=int(self.memo))(function)
+        return function
+
+class Style:
+    r"""
+    Conditional style of the cells of a table, see `__ToLaTeX__.set_styles`. The cells are styled by their numbers:
+
+    - 'max' and 'min' wrap the cells with the largest or smallest number in `command` (by default in bold).
+    - 'gradient' colors the background of the cells, from `colors[0]` at the smallest number to `colors[1]` at the largest
+      number, using `\cellcolor` (which requires the xcolor package with the table option).
+    - 'threshold' wraps the cells in the command of the largest threshold they reach, e.g. `thresholds=[(0, r"\color{blue}"),
+      (100, r"\cellcolor{red}")]`.
+
+    Cells which are not numbers are never styled.
+
+    Parameters
+    ----------
+    rule : str
+        'max', 'min', 'gradient' or 'threshold'.
+    columns : list of int, optional
+        the styled columns, indexed as in `set_formatters`. The default is all columns (except the index of a DataFrame).
+    axis : int or None, optional
+        the cells among which the largest and smallest numbers are found: those of a column (0), a row (1) or of
+        all `columns` together (None). The default is 0.
+    command : str, optional
+        the command of 'max' and 'min'. The default is r"\textbf".
+    colors : tuple, optional
+        the colors of 'gradient' at the smallest and the largest number. The default is ("white", "red").
+    thresholds : list of tuples, optional
+        the pairs (threshold, command) of 'threshold'.
+    """
+    def __init__(self, rule, columns=None, axis=0, command=r"\textbf", colors=("white", "red"), thresholds=None):
+        if(rule not in ("max", "min", "gradient", "threshold")):
+            raise ValueError("Unknown rule: " + str(rule))
+        if(rule == "threshold" and not thresholds):
+            raise ValueError("The 'threshold' rule requires thresholds")
+        if(axis not in (0, 1, None)):
+            raise ValueError("Expected axis 0, 1 or None, got " + str(axis))
+        self.rule = rule
+        self.columns = columns
+        self.axis = axis
+        self.command = command
+        self.colors = tuple(colors)
+        self.thresholds = sorted(thresholds or [], key=lambda t: t[0])
+
+    def __repr__(self):
+        options = ["{}={!r}".format(k, v) for k, v in vars(self).items() if k != "rule"]
+        return "Style(" + ", ".join(["{!r}".format(self.rule)] + options) + ")"
+
+def _extrema(values):
+    """
+    Returns the smallest and the largest number in the float array `values`, ignoring NaN (NaN if there are no numbers).
+    """
+    if(len(values) == 0):
+        return np.nan, np.nan
+    return float(np.fmin.reduce(values)), float(np.fmax.reduce(values))
+
+def _allocate(counts, n):
+    """
+    Divides a sample of `n` rows over groups of `counts` rows in proportion to their size (largest remainder method).
+    """
+    counts = np.asarray(counts)
+    n = min(n, int(counts.sum()))
+    exact = counts*n/max(1, counts.sum())
+    quotas = np.floor(exact).astype(int)
+    for i in np.argsort(quotas-exact, kind="stable")[:n-quotas.sum()]:
+        quotas[i] += 1
+    return np.minimum(quotas, counts)
+
+def _tail_offset(f, start, n, block=1<<16):
+    """
+    Finds the last `n` lines of the binary file `f` (but not before offset `start`) by reading it backwards in blocks.
+    Empty lines at the end of the file are ignored. Returns the offset of the first of these lines and the end of the last line.
+    """
+    pos = f.seek(0, 2)
+    stop = None
+    count = 0
+    while(pos > start):
+        size = min(block, pos-start)
+        pos -= size
+        f.seek(pos)
+        data = f.read(size)
+        if(stop is None):
+            data = data.rstrip(b"\r\n")
+            if(len(data)==0):
+                continue
+            stop = pos+len(data)
+            if(n==0):
+                return stop, stop
+        idx = len(data)
+        while(True):
+            idx = data.rfind(b"\n", 0, idx)
+            if(idx < 0):
+                break
+            count += 1
+            if(count == n):
+                return pos+idx+1, stop
+    return start, (start if stop is None else stop)
+
+#the aggregates of footers and subtotals, with their default labels
+AGGREGATES = {"sum": "Sum", "mean": "Mean", "min": "Min", "max": "Max", "std": "Std", "count": "Count"}
+
+def _floats(col):
+    """
+    Converts a column to a float array. Values which are not numbers become NaN.
+    """
+    try:
+        return np.asarray(col, dtype=float)
+    except (ValueError, TypeError):
+        def number(value):
+            try:
+                return float(value)
+            except (ValueError, TypeError):
+                return np.nan
+        return np.array([number(value) for value in col], dtype=float)
+
+def _integral(col):
+    """
+    Returns whether the numbers of a column are integers, as written (e.g. "30" rather than "30.0"), such that their sum,
+    minimum and maximum are printed as integers as well.
+    """
+    if(_is_array(col) and col.dtype != object):
+        return col.dtype.kind in "biu"
+    try:
+        text = "".join(col)
+    except TypeError:
+        return not any(isinstance(value, (float, np.floating)) and value == value for value in col)
+    return not any(c in text for c in ".eE")
+
+def _block_stats(columns, aggregated, by=None):
+    """
+    Computes the statistics of the columns with the indices `aggregated` of a block of columns, for every run of
+    equal values in column `by` (or the whole block). Returns a list of runs (key, number of rows, statistics),
+    where the statistics are an array of the count, sum, sum of squared deviations from the mean, minimum and
+    maximum of the numbers in each column, and whether the column is integral (1.0 or 0.0, see `_integral`).
+    """
+    nrows = len(columns[0]) if len(columns) else 0
+    if(nrows == 0):
+        return []
+    if(by is None):
+        starts = np.zeros(1, dtype=int)
+        keys = [None]
+    else:
+        values = np.asarray(columns[by])
+        starts = np.concatenate([[0], np.flatnonzero(values[1:] != values[:-1])+1])
+        keys = values[starts].tolist()
+    lengths = np.diff(np.append(starts, nrows))
+    values = np.column_stack([_floats(columns[i]) for i in aggregated]) if aggregated else np.empty((nrows, 0))
+    valid = ~np.isnan(values)
+    count = np.add.reduceat(valid.astype(float), starts, axis=0)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.repeat(sums/count, lengths, axis=0)
+        m2 = np.add.reduceat(np.where(valid, (values-means)**2, 0.0), starts, axis=0)
+        mins = np.fmin.reduceat(values, starts, axis=0)
+        maxs = np.fmax.reduceat(values, starts, axis=0)
+    integral = np.array([float(_integral(columns[i])) for i in aggregated])
+    return [(key, int(length), np.array([count[r], sums[r], m2[r], mins[r], maxs[r], integral]))
+            for r, (key, length) in enumerate(zip(keys, lengths))]
+
+def _merge_stats(a, b):
+    """
+    Merges the statistics (see `_block_stats`) of two sets of rows. `a` can be None.
+    """
+    if(a is None):
+        return b
+    n = a[0]+b[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = b[1]/b[0]-a[1]/a[0]
+        m2 = a[2]+b[2]+np.where(a[0]*b[0] > 0, delta**2*a[0]*b[0]/n, 0.0)
+    return np.array([n, a[1]+b[1], m2, np.fmin(a[3], b[3]), np.fmax(a[4], b[4]), np.fmin(a[5], b[5])])
+
+def _aggregate(stats, name):
+    """
+    Returns the aggregate `name` (see `AGGREGATES`) of every column from the statistics of `_block_stats`.
+    The standard deviation is the sample standard deviation. Columns without numbers are NaN (except for 'count').
+    """
+    count, sums, m2, mins, maxs = stats[:5]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if(name == "sum"):
+            return np.where(count > 0, sums, np.nan)
+        if(name == "mean"):
+            return sums/count
+        if(name == "std"):
+            return np.sqrt(m2/(count-1))
+    if(name == "min"):
+        return mins
+    if(name == "max"):
+        return maxs
+    if(name == "count"):
+        return count
+    raise ValueError("Unknown aggregate '{}', expected one of {}".format(name, ", ".join(AGGREGATES)))
+
+def _memoize(fmt, maxsize):
+    """
+    Returns the formatter `fmt` with a cache of `maxsize` formatted values. Format specifications are returned
+    as they are, since they are applied to whole columns at once.
+    """
+    if(not maxsize or isinstance(fmt, str)):
+        return fmt
+    if(isinstance(fmt, Format)):
+        options = {k: v for k, v in vars(fmt).items() if not k.startswith("_")}
+        options["memo"] = maxsize
+        return Format(**options)
+    import functools
+    return functools.lru_cache(maxsize=int(maxsize))(fmt)
+
+def _spans(levels):
+    """
+    Returns the spans of consecutive equal names in each of the header rows `levels` (from top to bottom), as lists of
+    (start, stop, name). A span also ends where a span of a row above it ends, such that the spans form a hierarchy.
+    """
+    spans = []
+    breaks = {0, len(levels[0])} if levels else set()
+    for level in levels:
+        breaks.update(i for i in range(1, len(level)) if level[i] != level[i-1])
+        edges = sorted(breaks)
+        spans.append([(a, b, level[a]) for a, b in zip(edges[:-1], edges[1:])])
+    return spans
+
 class __ToLaTeX__:
     def __init__(self, ncols, headers=None):
         self.ncols = ncols
@@ -23,9 +468,449 @@ class __ToLaTeX__:
         self.headers = headers
         self.include_headers = (headers is not None)
         self.keys["tabletype"] = "tabular"
+        self.chunksize = 10000
+        self.buffer_size = -1
+        self.stats = RenderStats()
+        self.cache = None
+        self.profiling = False
+        self.profile_callback = None
         
-    def set_longtable(self, val):
+    def set_longtable(self, val, repeat_headers=False):
+        r"""
+        If `val` is True, a longtable is created instead of a tabular. If `repeat_headers` is also True,
+        the headers are repeated at the top of every page (using `\endfirsthead` and `\endhead`).
+        """
         self.keys["tabletype"] = ("longtable" if val else "tabular")
+        self.keys["repeat_headers"] = repeat_headers
+        
+    def set_sample(self, head=None, tail=None, every=None, random=None, by=None, seed=None, ellipsis=r"$\vdots$"):
+        """
+        Renders only a selection of the rows, e.g. to summarize a huge dataset. The skipped rows are not formatted,
+        and, where possible, not even read. Call `set_sample()` without arguments to render all rows again.
+        Row lines (see `set_row_lines`) refer to the rows of the rendered table, including the ellipsis row.
+
+        Parameters
+        ----------
+        head : int, optional
+            number of rows at the start of the table. An ellipsis row marks the skipped rows after them.
+        tail : int, optional
+            number of rows at the end of the table, which can be combined with `head`.
+            `CSVToLaTeX` finds them by reading the file backwards.
+        every : int, optional
+            render every `every`-th row, starting with the first row.
+        random : int, optional
+            render a random sample of `random` rows, in their original order.
+        by : int or str, optional
+            stratify the random sample by the values of this column (an index, or a column name of a DataFrame
+            or a csv file with headers): every value gets its proportional share of the sample.
+        seed : int, optional
+            seed of the random sample.
+        ellipsis : str, optional
+            content of every cell of the ellipsis row. The default is r"$\\vdots$".
+
+        Raises
+        ------
+        ValueError
+            if the modes are combined (other than `head` and `tail`).
+
+        Returns
+        -------
+        None.
+
+        """
+        modes = (head is not None or tail is not None) + (every is not None) + (random is not None)
+        if(modes == 0):
+            self.keys.pop("sample", None)
+            return
+        if(modes > 1):
+            raise ValueError("Only head and tail can be combined")
+        if(by is not None and random is None):
+            raise ValueError("A stratified sample requires the sample size 'random'")
+        if(by is not None and not isinstance(by, int)):
+            try:
+                by = self.__position__(by)
+            except (ValueError, TypeError):
+                raise ValueError("Unknown column: " + str(by))
+        self.keys["sample"] = {"head": head, "tail": tail, "every": every, "random": random, "by": by, "seed": seed,
+                               "ellipsis": ellipsis}
+
+    def __sample_segments__(self, nrows):
+        """
+        Returns the rows selected by `set_sample` out of `nrows` rows as a list of segments: slices or sorted arrays of
+        row numbers, and None for an ellipsis row.
+        """
+        sample = self.keys["sample"]
+        if(sample["every"] is not None):
+            return [slice(0, nrows, sample["every"])]
+        if(sample["random"] is None):
+            head, tail = sample["head"] or 0, sample["tail"] or 0
+            if(head+tail >= nrows):
+                return [slice(0, nrows)]
+            segments = [slice(0, head), None, slice(nrows-tail, nrows)]
+            return [segment for segment in segments if segment is None or segment.stop > segment.start]
+        rng = np.random.default_rng(sample["seed"])
+        if(sample["by"] is None):
+            return [np.sort(rng.choice(nrows, min(sample["random"], nrows), replace=False))]
+        groups = np.unique(np.asarray(self.__column__(sample["by"])), return_inverse=True)[1].ravel()
+        order = np.argsort(groups, kind="stable")
+        counts = np.bincount(groups)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rows = [rng.choice(order[start:start+count], quota, replace=False)
+                for start, count, quota in zip(starts, counts, _allocate(counts, sample["random"]))]
+        return [np.sort(np.concatenate(rows))]
+
+    def __subset__(self, rows):
+        pass #this has to be implemented by the other classes: returns a copy of the table with only `rows` (a slice or an array)
+
+    def __column__(self, by):
+        pass #this has to be implemented by the other classes: returns the values of column `by` (indexed as in `set_formatters`)
+    
+    def __position__(self, name):
+        """
+        Returns the index (as in `set_formatters`) of the column with the header `name`.
+        """
+        return list(self.headers).index(name)
+
+    def __ellipsis__(self):
+        """
+        Returns the ellipsis row of a sample, as a block of formatted rows.
+        """
+        return [" & ".join([self.keys["sample"]["ellipsis"]]*self.ncols)]
+
+    def __sample_blocks__(self, workers=1):
+        """
+        Yields the blocks of formatted rows of the sample (see `set_sample`). Every segment of the sample is rendered
+        as a table of its own, which only contains the selected rows.
+        """
+        for segment in self.__sample_segments__(self.nrows):
+            if(segment is None):
+                yield self.__ellipsis__()
+                continue
+            table = self.__subset__(segment)
+            table.__prepare__()
+            yield from (table.__iter_blocks__() if workers<=1 else table.__parallel_blocks__(workers))
+
+    def set_footers(self, aggregates=None, columns=None, label_column=0, labels=None, lines=1):
+        r"""
+        Adds footer rows with aggregates of the columns, e.g. `set_footers(["sum", "mean"])`. The aggregates are
+        computed while the table is rendered, in the same pass over the data, so this also works for csv files.
+        The footers are formatted by the formatters of their columns and follow the row lines (see `set_row_lines`).
+        If only a sample is rendered (see `set_sample`), the aggregates are those of the sample.
+        Call `set_footers()` without arguments to remove the footers.
+
+        Parameters
+        ----------
+        aggregates : str or list of str
+            one footer row per aggregate: 'sum', 'mean', 'min', 'max', 'std' (the sample standard deviation) or
+            'count' (the number of numeric values).
+        columns : list of int, optional
+            the columns which are aggregated, indexed as in `set_formatters` (the index of a DataFrame is not counted).
+            The default is all columns, except for `label_column` and the index of a DataFrame.
+            Values that are not numbers are ignored, columns without any numbers are left empty.
+        label_column : int, optional
+            the column of the table which contains the names of the aggregates, or None. Unlike `columns`, it counts the
+            index of a DataFrame, such that the names can be put in the index column. The default is 0.
+        labels : dict, optional
+            names of the aggregates, e.g. {"sum": "Total"}. The defaults are in `AGGREGATES`.
+        lines : int, optional
+            number of `\hline` between the body and the footers. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(aggregates is None):
+            self.keys.pop("footers", None)
+            return
+        self.keys["footers"] = {"aggregates": [aggregates] if isinstance(aggregates, str) else list(aggregates),
+                                "columns": columns, "label_column": label_column, "labels": labels or {}, "lines": lines}
+
+    def set_subtotals(self, by=None, aggregates="sum", columns=None, label="{name} {key}", labels=None):
+        """
+        Adds subtotal rows after every group of consecutive rows with the same value in column `by`, for example
+        after every year in a table which is sorted by year. Like footers (see `set_footers`), the subtotals are
+        computed in the same pass as the rendering. Call `set_subtotals()` without arguments to remove them.
+
+        Parameters
+        ----------
+        by : int or str
+            the column of the table which defines the groups, by index (counting the index of a DataFrame, like
+            `label_column` in `set_footers`) or by header.
+        aggregates : str or list of str, optional
+            one subtotal row per aggregate, see `set_footers`. The default is 'sum'.
+        columns : list of int, optional
+            the columns which are aggregated, indexed as in `set_formatters` (see `set_footers`).
+            The default is all columns, except for `by` and the index of a DataFrame.
+        label : str, optional
+            content of column `by` in the subtotal rows, where {name} is replaced by the name of the aggregate
+            and {key} by the value of the group (formatted by the formatter of column `by`). The default is "{name} {key}".
+        labels : dict, optional
+            names of the aggregates, see `set_footers`.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(by is None):
+            self.keys.pop("subtotals", None)
+            return
+        if(isinstance(by, str)):
+            by = list(self.headers).index(by)
+        self.keys["subtotals"] = {"by": by, "aggregates": [aggregates] if isinstance(aggregates, str) else list(aggregates),
+                                  "columns": columns, "label": label, "labels": labels or {}}
+
+    def __aggregated__(self):
+        """
+        Returns the columns which have to be aggregated for the footers and subtotals, or None if there are none.
+        """
+        configs = [(self.keys[key], self.keys[key].get("label_column", self.keys[key].get("by")))
+                   for key in ("footers", "subtotals") if key in self.keys]
+        if(len(configs) == 0):
+            return None
+        columns = set()
+        for config, label_column in configs:
+            columns.update(self.__aggregate_columns__(config, label_column))
+        return sorted(columns)
+    
+    def __aggregate_columns__(self, config, label_column):
+        """
+        Returns the columns of the table which are aggregated by `config`, whose columns are indexed as in `set_formatters`.
+        """
+        data = self.__data_columns__()
+        if(config["columns"] is None):
+            return [i for i in data if i != label_column]
+        return [data[i%len(data)] for i in config["columns"]]
+
+    def __data_columns__(self):
+        """
+        Returns the columns of the table which contain data (as opposed to e.g. the index of a DataFrame).
+        """
+        return range(self.ncols)
+
+    def __aggregate_rows__(self, stats, config, label_column, key=None):
+        """
+        Returns the formatted footer or subtotal rows with the aggregates of `config` of the statistics `stats`.
+        """
+        aggregated = self.__aggregated__()
+        columns = self.__aggregate_columns__(config, label_column)
+        rows = []
+        for name in config["aggregates"]:
+            values = _aggregate(stats, name)
+            #counts are integers, as are the sum, minimum and maximum of integral columns
+            integral = stats[5] if name in ("sum", "min", "max") else np.full(len(aggregated), float(name == "count"))
+            cells = [""]*self.ncols
+            for i in columns:
+                k = aggregated.index(i)
+                value = values[k]
+                if(not np.isnan(value)):
+                    cells[i] = self.__format_cell__(i, int(value) if integral[k] and np.isfinite(value) else float(value))
+            if(label_column is not None):
+                label = config["labels"].get(name, AGGREGATES.get(name, name))
+                if(key is not None):
+                    label = config["label"].format(name=label, key=self.__format_cell__(label_column, key))
+                cells[label_column] = label
+            rows.append(" & ".join(cells))
+        return rows
+
+    def __format_cell__(self, i, value):
+        """
+        Formats a single value of column `i` as in the body of the table. If the body is parsed (see `CSVToLaTeX`),
+        the formatters receive strings, so the value is passed as a string.
+        """
+        formatters, parse, escape = self.__body_format__
+        if(parse is not None and not isinstance(formatters[i], str)):
+            value = str(value)
+        return self.__row_formatter__([formatters[i]], parse, [escape[i]], aggregate=False)([[value]])[0]
+
+    def __aggregate_blocks__(self, blocks):
+        """
+        Passes on the blocks of formatted rows, while merging the statistics of their runs (collected in `__runs__`
+        by the row formatter) into the totals and inserting the subtotal rows.
+        """
+        subtotals = self.keys.get("subtotals")
+        total = None
+        pending = None
+        for lines in blocks:
+            runs = self.__runs__[:]
+            del self.__runs__[:]
+            for key, length, stats in runs:
+                total = _merge_stats(total, stats)
+            if(subtotals is None):
+                yield lines
+                continue
+            items = []
+            pos = 0
+            for key, length, stats in runs:
+                if(pending is not None and pending[0] == key):
+                    pending[1] = _merge_stats(pending[1], stats)
+                else:
+                    if(pending is not None):
+                        items += self.__aggregate_rows__(pending[1], subtotals, subtotals["by"], pending[0])
+                    pending = [key, stats]
+                items += lines[pos:pos+length]
+                pos += length
+            items += lines[pos:]
+            yield items
+        if(pending is not None):
+            yield self.__aggregate_rows__(pending[1], subtotals, subtotals["by"], pending[0])
+        self.__totals__ = total
+
+    def __footer_items__(self, rownr, all_lines, rlines, positions):
+        r"""
+        Returns the `\hline` separators and the footer rows (see `set_footers`) as a list of strings, after rendering the body.
+        """
+        if("footers" not in self.keys):
+            return []
+        footers = self.keys["footers"]
+        stats = self.__totals__
+        if(stats is None):
+            stats = np.zeros((6, len(self.__aggregated__()))) #no rows, see `_block_stats`
+            stats[3:5] = np.nan
+            stats[5] = 1.0
+        rows = self.__aggregate_rows__(stats, footers, footers["label_column"])
+        return ["\\hline\n"]*footers["lines"] + self.__place_lines__(rows, rownr, all_lines, rlines, positions)
+
+    def set_styles(self, *styles):
+        """
+        Styles the cells of the table body by their values, on top of the formatters (see `Style`). For example, the
+        best value of every column is printed in bold by `set_styles(Style("max"))`, and a heatmap is rendered by
+        `set_styles(Style("gradient"))`. The styles are applied in order, to the formatted (and escaped) cells.
+        The smallest and largest numbers of the columns are computed before rendering, in a vectorized pass over each
+        column (a separate pass over the file in blocks for `CSVToLaTeX`). They are those of the whole table, also when
+        a sample is rendered (see `set_sample`). The cells of every block are styled using array operations.
+        Call `set_styles()` without arguments to remove the styles.
+
+        Parameters
+        ----------
+        *styles : Style
+            the styles.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(len(styles) == 0):
+            self.keys.pop("styles", None)
+            return
+        self.keys["styles"] = list(styles)
+    
+    def __column_stats__(self, columns):
+        """
+        Returns the smallest and largest number of each of `columns` (indexed as in `set_formatters`), as a dictionary.
+        """
+        return {i: _extrema(_floats(self.__column__(i))) for i in columns}
+    
+    def __styler__(self, offset=0):
+        """
+        Compiles the styles (see `set_styles`) for the body, whose columns start at column `offset` of the blocks.
+        Returns the indices of the styled columns of the blocks and a function which takes a block of columns and returns
+        the styles of their cells: a dictionary which maps the index of a column to a list of (rows, commands), where
+        the commands are a single command for all rows or one per row. Returns None if no styles are set.
+        """
+        if("styles" not in self.keys):
+            return None
+        ncols = len(self.__data_columns__())
+        styles = [(style, list(range(ncols)) if style.columns is None else [i%ncols for i in style.columns]) for style in self.keys["styles"]]
+        needed = sorted({i for style, columns in styles if style.rule != "threshold" and style.axis != 1 for i in columns})
+        if(getattr(self, "__style_stats__", None) is None or not set(needed) <= set(self.__style_stats__)):
+            self.__style_stats__ = self.__column_stats__(needed)
+        stats = self.__style_stats__
+        def extrema(style, columns, values):
+            if(style.axis == 1):
+                block = np.vstack(values)
+                return [(np.fmin.reduce(block, axis=0), np.fmax.reduce(block, axis=0))]*len(columns)
+            if(style.axis is None):
+                lo, hi = _extrema(np.array([stats[i] for i in columns], dtype=float).ravel())
+                return [(lo, hi)]*len(columns)
+            return [stats[i] for i in columns]
+        def styled(columns):
+            marks = dict()
+            for style, indices in styles:
+                values = [_floats(columns[i+offset]) for i in indices]
+                if(style.rule == "threshold"):
+                    bounds = np.array([t for t, _ in style.thresholds], dtype=float)
+                    commands = [c for _, c in style.thresholds]
+                    for i, v in zip(indices, values):
+                        level = np.searchsorted(bounds, v, side="right")-1
+                        rows = np.flatnonzero((level >= 0) & ~np.isnan(v))
+                        marks.setdefault(i+offset, []).append((rows.tolist(), [commands[l] for l in level[rows].tolist()]))
+                    continue
+                if(style.rule == "gradient"):
+                    low, high = style.colors
+                    commands = [r"\cellcolor{{{}!{:d}!{}}}".format(high, p, low) for p in range(101)]
+                for i, v, (lo, hi) in zip(indices, values, extrema(style, indices, values)):
+                    if(style.rule == "gradient"):
+                        rows = np.flatnonzero(~np.isnan(v))
+                        with np.errstate(invalid="ignore", divide="ignore"):
+                            share = np.where(hi > lo, (v-lo)/(hi-lo), 0.0)
+                        percent = np.clip(np.rint(share[rows]*100), 0, 100).astype(int)
+                        marks.setdefault(i+offset, []).append((rows.tolist(), [commands[p] for p in percent.tolist()]))
+                    else:
+                        rows = np.flatnonzero(v == (hi if style.rule == "max" else lo))
+                        marks.setdefault(i+offset, []).append((rows.tolist(), style.command))
+            return marks
+        return {i+offset for _, indices in styles for i in indices}, styled
+    
+    def set_chunksize(self, chunksize):
+        """
+        Sets the number of rows which are read, formatted and written at once. Larger chunks
+        are faster, but use more memory. The default is 10000.
+        """
+        self.chunksize = chunksize
+    
+    def set_buffer_size(self, buffer_size):
+        """
+        Sets the buffer size (in bytes) of the output file. The default is -1, the system default.
+        """
+        self.buffer_size = buffer_size
+        
+    def set_profiling(self, val, callback=None):
+        """
+        If `val` is True, rendering records the time and number of calls of every stage in `stats` (see `RenderStats`):
+        reading the data, formatting every column, joining the cells, placing the lines and writing the output.
+        This identifies slow formatters per column, at the cost of some overhead.
+        If several `workers` are used (see `tolatex`), only the stages in the main process are recorded.
+
+        Parameters
+        ----------
+        val : bool
+            whether or not to profile the rendering.
+        callback : function, optional
+            a function which is called with the `RenderStats` after every block of rows, e.g. to report progress.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.profiling = val
+        self.profile_callback = callback
+    
+    def set_cache(self, directory, max_size=256*1024**2):
+        """
+        Enables caching of the rendered table in `directory` (see `TableCache`). `tolatex` then skips
+        rendering if the input data and the configuration of the table did not change since an earlier call,
+        and it does not touch the output file at all if it is already up to date.
+        Formatters are identified by their code, constants and closure variables, not by the globals they use.
+
+        Parameters
+        ----------
+        directory : str or None
+            the cache directory. If None, caching is disabled.
+        max_size : int, optional
+            maximum total size of the cache in bytes. The least recently used tables are evicted
+            when it is exceeded. The default is 256 MiB.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.cache = None if directory is None else TableCache(directory, max_size)
         
     def set_include_headers(self, val):
         """
@@ -65,6 +950,50 @@ class __ToLaTeX__:
         else:
             raise ValueError("Number of headers does not match number of columns")
     
+    def set_header_levels(self, levels=None, rule="cmidrule"):
+        r"""
+        Adds header rows above the headers, in which consecutive equal names are merged into a single cell
+        (`\multicolumn`), e.g. to group the columns of grouped results. A merged cell never extends beyond a merged
+        cell of the row above it. The span layout is computed once, when the levels are set.
+        The headers of a DataFrame with MultiIndex columns are set up like this automatically.
+
+        Parameters
+        ----------
+        levels : list of lists, optional
+            the header rows from top to bottom, each with one name per column. Columns with an empty name are left blank.
+            If None, only `rule` is changed. The default is None.
+        rule : str, optional
+            the rule below every merged cell with a name: 'cmidrule' (requires the booktabs package), 'cline' or None.
+            The default is 'cmidrule'.
+
+        Raises
+        ------
+        ValueError
+            If the length of a level does not match the number of columns.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(levels is not None):
+            levels = [[str(name) for name in level] for level in levels]
+            if(any(len(level)!=self.ncols for level in levels)):
+                raise ValueError("Number of headers does not match number of columns")
+            self.keys["header_levels"] = _spans(levels)
+        if(rule not in ("cmidrule", "cline", None)):
+            raise ValueError("Unknown rule: " + str(rule))
+        self.keys["header_rule"] = rule
+    
+    def __span_column__(self, start, stop):
+        r"""
+        Returns the column type of a `\multicolumn` over the columns `start` to `stop`, including the column lines at its edges.
+        """
+        if(type(self.columns) is str or "clines" not in self.keys):
+            return "c"
+        lines = self.keys["clines"]
+        return (lines[0] if start == 0 else "") + "c" + lines[stop]
+    
     def set_columns(self, columns):
         """
         Sets the column types of the table. The argument can be either a string or a list.
@@ -84,6 +1013,7 @@ class __ToLaTeX__:
         """
         if(type(columns) is str):
             self.columns = columns
+            return
         if(len(columns)!=self.ncols):
             raise ValueError("Number of columns given does not correspond to ncols")
         self.columns = []
@@ -161,13 +1091,15 @@ class __ToLaTeX__:
         self.keys["hlines"] = lines
     
     def set_row_lines(self, lines):
-        """
+        r"""
         Sets the indices of the rows after which a separator line (`\hline`) should be added
 
         Parameters
         ----------
-        lines : list of int
-            indices of the rows. -1 indicates the line at the end of the table
+        lines : list of int or str
+            indices of the rows, in any order. -1 indicates the line at the end of the table.
+            An index which occurs more than once adds multiple lines (e.g. a double line).
+            Alternatively, 'all' or 'none' adds a line after every row or no lines at all.
 
         Returns
         -------
@@ -176,18 +1108,26 @@ class __ToLaTeX__:
         """
         self.keys["rlines"] = lines
     
-    def set_formatters(self, formatters):
-        """
+    def set_formatters(self, formatters, memo=None):
+        r"""
         Sets the formatters of the columns. This is usually necessary to obtain convert the CSV data to the
         required precision or notation. For example, printing each value with 2 decimal precision is done using
-        `set_formatters(lambda s: "{:.2f}".format(float(s)))
+        `set_formatters(lambda s: "{:.2f}".format(float(s)))`, or, using a format specification, `set_formatters(".2f")`.
 
         Parameters
         ----------
-        formatters : list or lambda
-            if lambda, a list of length `ncols` is created with each element being equal to `formatters`.
+        formatters : list, lambda or str
+            if lambda or str, a list of length `ncols` is created with each element being equal to `formatters`.
             The length of this list should equal the number of columns. Each element should be a function
-            that takes a string as input and returns the formatted value.
+            that takes a string as input and returns the formatted value, or a format specification.
+            A format specification is either a spec such as ".2f" or ".3e", or a format string with a single
+            replacement field such as r"\num{{{:.3e}}}" (siunitx). Format specifications are applied to whole
+            columns at once, which is much faster than calling a function for every cell.
+            A `Format` combines the common options (precision, notation, percentages, grouping, escaping and
+            bold values) and is compiled into a format specification where possible.
+        memo : int, optional
+            if given, the values formatted by functions are cached in a cache of `memo` values per column, which
+            speeds up expensive formatters of columns with many repeated values. The values have to be hashable.
 
         Raises
         ------
@@ -201,36 +1141,76 @@ class __ToLaTeX__:
         """
         if(isinstance(formatters, (tuple, list))):    
             if(len(formatters) == self.ncols):
-                self.formatters = formatters
+                self.formatters = [_memoize(fmt, memo) for fmt in formatters]
             else:
                 raise ValueError("length of argument does not match number of columns")
         else:
-            self.formatters = [formatters]*self.ncols
+            self.formatters = [_memoize(formatters, memo) for _ in range(self.ncols)]
+    
+    def set_escape(self, columns=True, math=True, headers=True):
+        """
+        Escapes the characters with a special meaning in LaTeX, such as '&', '%', '_', '#' and '$', in the formatted
+        cells. The cells are escaped a whole column at a time, which is much faster than escaping them in a formatter.
+        Formatters of escaped columns should therefore return plain text, rather than LaTeX commands.
+
+        Parameters
+        ----------
+        columns : bool or list of int, optional
+            the columns to escape (indexed as in `set_formatters`), True for all columns or False for none. The default is True.
+            The index of a DataFrame is not escaped, it can be escaped by its formatter, e.g. `Format(escape=True)`.
+        math : bool, optional
+            If True, formulas between dollar signs, such as "$x_{i}$", are left as they are. The default is True.
+        headers : bool, optional
+            If True, the headers are escaped as well. The default is True.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(not isinstance(columns, bool)):
+            columns = sorted(set(i%self.ncols for i in columns))
+        self.keys["escape"] = columns
+        self.keys["escape_math"] = math
+        self.keys["escape_headers"] = headers
     
-    def set_formatter(self, idx, formatter):
+    def __escaped__(self):
+        """
+        Returns for every column whether its cells are escaped, see `set_escape`.
+        """
+        columns = self.keys.get("escape", False)
+        if(isinstance(columns, bool)):
+            return [columns]*self.ncols
+        return [i in columns for i in range(self.ncols)]
+    
+    def set_formatter(self, idx, formatter, memo=None):
         """
         Sets the formatter of column `idx`
         Parameters
         ----------
         idx : int
             index of the column, 0 being the leftmost column.
-        formatter : lambda or function
+        formatter : lambda, function, str or Format
             a function which takes a string as input and returns the formatted value. Example `set_formatter(0, lambda s: "{:.2f}".format(float(s)))`
+            Alternatively, a format specification such as ".2f" or a `Format` (see `set_formatters`).
+        memo : int, optional
+            size of the cache of formatted values (see `set_formatters`).
 
         Returns
         -------
         None.
 
         """
-        self.formatters[idx] = formatter
+        self.formatters[idx] = _memoize(formatter, memo)
     
     def __get_lines__(self):
         #columns
-        if(self.columns is None):
-            self.columns = ["c"]*self.ncols
+        columns = self.columns
+        if(columns is None):
+            columns = ["c"]*self.ncols
             
-        if(type(self.columns) is str):
-            colstr = self.columns
+        if(type(columns) is str):
+            colstr = columns
         else:
             if("clines" in self.keys):
                 lines = self.keys["clines"]
@@ -239,21 +1219,27 @@ class __ToLaTeX__:
             
             colstr = lines[0]
             for i in range(self.ncols):
-                colstr += self.columns[i]+lines[i+1]
-        #rows
+                colstr += columns[i]+lines[i+1]
+        #rows: a lookup of the number of lines after each row, and the number of lines at the end
         all_lines = False
-        rlines = []
+        rlines = dict()
+        end_lines = 0
         if("rlines" in self.keys):
             if(type(self.keys["rlines"]) is str):
                 if(self.keys["rlines"] == "all"): all_lines = True
-                elif(self.keys["rlines"] == "none"): rlines = [100000000]
             else:
-                rlines = self.keys["rlines"]
-        else:
-            rlines = [np.infty]
-        return colstr, all_lines, rlines
+                for row in self.keys["rlines"]:
+                    if(row == -1):
+                        end_lines += 1
+                    elif(row >= 0):
+                        rlines[row] = rlines.get(row, 0)+1
+        return colstr, all_lines, rlines, end_lines
     
-    def __construct_headers__(self, colstr):
+    def __construct_headers__(self, colstr, repeat=None):
+        """
+        Returns the beginning of the table environment and the headers. If `repeat` is True (by default, if it was
+        set by `set_longtable`) and the table is a longtable, the headers are repeated on every page.
+        """
         headers = r"\begin{"+self.keys["tabletype"]+"}{"+colstr+"}" + "\n"
         
         if("hlines" in self.keys):
@@ -269,35 +1255,703 @@ class __ToLaTeX__:
             hlines=[0,1]
         idx = 0
         if(self.include_headers):
-            if("bold" in self.keys and self.keys["bold"]):
-                self.headers = [r"\textbf{"+str(s)+"}" for s in self.headers]
+            def style(names):
+                if(self.keys.get("escape", False) is not False and self.keys.get("escape_headers", True)):
+                    names = _escape_cells([str(s) for s in names], self.keys.get("escape_math", True))
+                if("bold" in self.keys and self.keys["bold"]):
+                    names = [r"\textbf{"+str(s)+"}" for s in names]
+                return names
             while(idx<len(hlines) and hlines[idx]==0):
                 headers += "\\hline\n"
                 idx += 1
-            headers += " & ".join(self.headers) + "\\\\\n"
+            rule = {"cmidrule": r"\cmidrule(lr){{{:d}-{:d}}}", "cline": r"\cline{{{:d}-{:d}}}"}.get(self.keys.get("header_rule"))
+            for spans in self.keys.get("header_levels", []):
+                cells = []
+                rules = []
+                for (start, stop, name), styled in zip(spans, style([name for _, _, name in spans])):
+                    if(name == ""):
+                        cells += [""]*(stop-start)
+                        continue
+                    cells.append(styled if stop-start == 1 else
+                                 r"\multicolumn{{{:d}}}{{{}}}{{{}}}".format(stop-start, self.__span_column__(start, stop), styled))
+                    if(rule is not None):
+                        rules.append(rule.format(start+1, stop))
+                headers += " & ".join(cells) + "\\\\\n"
+                if(rules):
+                    headers += " ".join(rules) + "\n"
+            headers += " & ".join(style(self.headers)) + "\\\\\n"
             while(idx<len(hlines) and hlines[idx]==1):
                 headers += "\\hline\n"
                 idx += 1
+            if(repeat is None):
+                repeat = self.keys.get("repeat_headers", False)
+            if(repeat and self.keys["tabletype"] == "longtable"):
+                head = headers[headers.index("\n")+1:]
+                headers += "\\endfirsthead\n" + head + "\\endhead\n"
         return headers
     
-    def tolatex(self):
-        pass #this has to be implemented by the other classes
-
-class CSVToLaTeX(__ToLaTeX__):
-    def __init__(self, fname : str, ncols=None, header=False, **kwargs):
+    def __row_formatter__(self, formatters, parse=None, escape=None, aggregate=True, style=None):
         """
-        Creates the CSVToLaTeX object. Remember to close the object with `.close()` to close the csv input stream.
+        Compiles `formatters` into a function which takes a block of columns (sequences of equal length)
+        and returns the rows of the block as strings of joined cells.
+        Format specifications are merged into a single row template, so these columns are formatted
+        and joined in one call per row. Numpy columns are converted to Python scalars in bulk.
+        Other formatters are called once per cell and their output is inserted into the template.
+        If given, `parse` converts the values of columns with a format specification (e.g. `float` for csv data).
+        The formatted cells of the columns for which `escape` (default: as set by `set_escape`) is True
+        are escaped a whole column at a time. If `aggregate` is True, the function also collects the statistics
+        for the footers and subtotals (see `__aggregating__`). If given, `style` (see `__styler__`) styles the cells.
+        """
+        if(escape is None):
+            escape = self.__escaped__()
+        if(aggregate):
+            return self.__aggregating__(self.__row_formatter__(formatters, parse, escape, aggregate=False, style=style),
+                                        formatters, parse, escape)
+        math = self.keys.get("escape_math", True)
+        fields = []
+        functions = []
+        python = set() #columns whose formatters accept Python scalars instead of numpy scalars
+        for fmt in formatters:
+            compiled = isinstance(fmt, Format) or fmt is str
+            if(isinstance(fmt, Format)):
+                fmt = fmt.compile()
+            if(isinstance(fmt, str)):
+                fields.append(fmt if "{" in fmt else "{:" + fmt + "}")
+                functions.append(None)
+            else:
+                fields.append("{}")
+                functions.append(fmt)
+                if(compiled):
+                    python.add(len(functions)-1)
+        escape = {i for i in range(len(fields)) if escape[i]}
+        styled, marking = style if style is not None else (set(), None)
+        template = " & ".join(["{}" if i in escape or i in styled else field for i, field in enumerate(fields)]).format
+        def column(i, col):
+            fmt = functions[i]
+            if(fmt is None):
+                if(parse is not None):
+                    return map(parse, col)
+                return col.tolist() if _is_array(col) else col
+            if(i in python and _is_array(col) and (col.dtype.kind in "biu" or col.dtype == np.float64)):
+                #Python scalars print exactly like these numpy scalars, but much faster
+                return map(fmt, col.tolist())
+            return map(fmt, col)
+        def escaped(i, col):
+            cells = column(i, col)
+            if(functions[i] is None):
+                cells = map(fields[i].format, cells)
+            return _escape_cells(list(cells), math)
+        wrap = "{}{{{}}}".format
+        wrapped = ["{}{{" + field + "}}" for field in fields] #the cells of a format specification, wrapped in a command
+        def formatted(i, col, marks):
+            marks = marks.get(i, [])
+            if(i in escape):
+                cells = escaped(i, col)
+            elif(functions[i] is None and marks and len(marks[0][0]) == len(col) and not isinstance(marks[0][1], str)):
+                #every cell gets its own command (e.g. a gradient): the cells are formatted and wrapped in one call
+                cells = list(map(wrapped[i].format, marks[0][1], column(i, col)))
+                marks = marks[1:]
+            else:
+                cells = column(i, col)
+                cells = list(cells if functions[i] is not None else map(fields[i].format, cells))
+            for rows, commands in marks:
+                if(isinstance(commands, str)):
+                    for row in rows:
+                        cells[row] = commands + "{" + cells[row] + "}"
+                elif(len(rows) == len(cells)):
+                    cells = list(map(wrap, commands, cells))
+                else:
+                    for row, command in zip(rows, commands):
+                        cells[row] = command + "{" + cells[row] + "}"
+            return cells
+        if(not self.profiling):
+            if(marking is None):
+                def format_rows(columns):
+                    return list(map(template, *[escaped(i, col) if i in escape else column(i, col)
+                                                for i, col in zip(range(len(fields)), columns)]))
+                return format_rows
+            def format_rows(columns):
+                marks = marking(columns)
+                return list(map(template, *[formatted(i, col, marks) if i in styled else escaped(i, col) if i in escape else column(i, col)
+                                            for i, col in zip(range(len(fields)), columns)]))
+            return format_rows
         
-        Parameters
-        ----------
-        fname : string
-            name of the input csv file.
-        ncols : int, optional
+        #profiling: every column is formatted separately, such that the time of its formatter can be measured
+        stats = self.stats
+        join = " & ".join(["{}"]*len(fields)).format
+        def format_rows(columns):
+            values = []
+            marks = dict()
+            if(marking is not None):
+                t0 = time.perf_counter()
+                marks = marking(columns)
+                stats.add("style", time.perf_counter()-t0)
+            for i, col in zip(range(len(fields)), columns):
+                t0 = time.perf_counter()
+                if(i in styled):
+                    cells = formatted(i, col, marks)
+                elif(i in escape):
+                    cells = escaped(i, col)
+                else:
+                    cells = column(i, col)
+                    if(functions[i] is None):
+                        cells = map(fields[i].format, cells)
+                values.append(list(cells))
+                stats.add_column(i, time.perf_counter()-t0, len(values[-1]))
+            t0 = time.perf_counter()
+            rows = list(map(join, *values))
+            stats.add("join", time.perf_counter()-t0)
+            return rows
+        return format_rows
+    
+    def __aggregating__(self, format_rows, formatters, parse, escape):
+        """
+        Wraps the row formatter `format_rows` of the body, such that it also adds the statistics of every block
+        (see `_block_stats`) to `__runs__`, if footers or subtotals are set.
+        """
+        aggregated = self.__aggregated__()
+        if(aggregated is None):
+            return format_rows
+        self.__body_format__ = (formatters, parse, escape)
+        by = self.keys["subtotals"]["by"] if "subtotals" in self.keys else None
+        runs = self.__dict__.setdefault("__runs__", [])
+        if(not self.profiling):
+            def aggregating(columns):
+                runs.extend(_block_stats(columns, aggregated, by))
+                return format_rows(columns)
+            return aggregating
+        stats = self.stats
+        def aggregating(columns):
+            t0 = time.perf_counter()
+            runs.extend(_block_stats(columns, aggregated, by))
+            stats.add("aggregate", time.perf_counter()-t0)
+            return format_rows(columns)
+        return aggregating
+    
+    def __place_lines__(self, lines, rownr, all_lines, rlines, positions):
+        r"""
+        Adds the line endings and `\hline` separators to a block of rows, given as strings of joined cells.
+        `rownr` is the number of the first row in the block, `rlines` maps row numbers to the number of lines
+        below them and `positions` are the sorted keys of `rlines`.
+        Returns the rows and separators as a list of strings.
+        """
+        endline = r"\\" + "\n"
+        rows = [line + endline for line in lines]
+        if(all_lines):
+            items = ["\\hline\n"]*(2*len(rows))
+            items[::2] = rows
+            return items
+        items = []
+        last = 0
+        for row in positions[bisect_left(positions, rownr):bisect_left(positions, rownr+len(rows))]:
+            pos = row-rownr+1
+            items += rows[last:pos]
+            items += ["\\hline\n"]*rlines[row]
+            last = pos
+        items += rows[last:]
+        return items
+    
+    def __prepare__(self):
+        """
+        Prepares the converter for rendering. Subclasses that need more than the compiled formatters
+        (e.g. extracted columns) extend this method. It is called before the worker processes are started.
+        """
+        self.__format_rows__ = self.__row_formatter__(self.formatters, style=self.__styler__())
+    
+    def __shards__(self):
+        """
+        Returns the shards of the table body: independent pieces that can be formatted by `__format_shard__`.
+        By default, these are ranges of `chunksize` rows.
+        """
+        return ((start, min(start+self.chunksize, self.nrows)) for start in range(0, self.nrows, self.chunksize))
+    
+    def __format_shard__(self, shard):
+        pass #this has to be implemented by the other classes
+    
+    def __iter_blocks__(self):
+        """
+        Yields the blocks of formatted rows of the table body, in order.
+        """
+        return map(self.__format_shard__, self.__shards__())
+    
+    def __parallel_blocks__(self, workers):
+        """
+        Same as `__iter_blocks__`, but formats the shards in a pool of `workers` processes.
+        At most `2*workers` shards are in flight, which bounds the memory usage.
+        Where available, the workers are forked, such that the table (including lambda formatters)
+        does not have to be pickled.
+        """
+        import multiprocessing
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method),
+                                 initializer=_init_worker, initargs=(self,)) as pool:
+            pending = deque()
+            def result():
+                lines, runs = pending.popleft().result()
+                if(runs):
+                    self.__runs__.extend(runs)
+                return lines
+            for shard in self.__shards__():
+                pending.append(pool.submit(_format_shard, shard))
+                if(len(pending) >= 2*workers):
+                    yield result()
+            while(pending):
+                yield result()
+    
+    def __open__(self, fname):
+        """
+        Returns a text stream which writes to `fname` and a function which finishes the output.
+        `fname` can be a file name or a file-like object. Binary streams (BytesIO, gzip files, sockets opened
+        with `makefile('wb')`, ...) are written as UTF-8. File-like objects are flushed, but not closed.
+        """
+        if(isinstance(fname, (str, bytes, os.PathLike))):
+            ofile = open(fname, 'w', buffering=self.buffer_size)
+            return ofile, ofile.close
+        if(isinstance(fname, (io.RawIOBase, io.BufferedIOBase)) or "b" in str(getattr(fname, "mode", ""))):
+            ofile = io.TextIOWrapper(fname, encoding="utf-8")
+            def finish():
+                ofile.flush()
+                ofile.detach()
+            return ofile, finish
+        return fname, getattr(fname, "flush", lambda: None)
+    
+    def tolatex(self, fname, workers=1):
+        """
+        Converts the data to a LaTeX table and writes it to `fname`.
+        The body is formatted and written in chunks of `chunksize` rows (see `set_chunksize`).
+        Afterwards, `stats` contains the number of rows, the elapsed time and the rows per second.
+
+        Parameters
+        ----------
+        fname : str or file-like object
+            name of the output file, or a (text or binary) file-like object to which the table is written.
+        workers : int, optional
+            number of processes which format the table body. The rows are split into shards, which are
+            formatted in parallel and reassembled in order. Only worthwhile for very large tables or
+            expensive formatters. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(self.cache is not None):
+            return self.__cached_tolatex__(fname, workers)
+        ofile, finish = self.__open__(fname)
+        if(self.profiling):
+            for chunk in self.iter_chunks(workers):
+                t0 = time.perf_counter()
+                ofile.write(chunk)
+                self.stats.add("write", time.perf_counter()-t0)
+        else:
+            for chunk in self.iter_chunks(workers):
+                ofile.write(chunk)
+        finish()
+    
+    def tolatex_parts(self, basename, rows_per_part, index=False, workers=1):
+        r"""
+        Splits the table into parts of at most `rows_per_part` rows, which are written to the files
+        `basename_part1.tex`, `basename_part2.tex`, ... Each part is a complete table with the headers, and
+        longtables repeat the headers on every page. `basename.tex` inputs all parts, but a document can
+        also include only the parts it needs. Splitting huge tables keeps LaTeX fast and its memory usage low.
+        Row lines (see `set_row_lines`) refer to the rows of the whole table.
+
+        Parameters
+        ----------
+        basename : str
+            path of the main file without the extension '.tex'. It is used as is in the `\input` commands,
+            so it should be relative to the directory in which the document is compiled.
+        rows_per_part : int
+            maximum number of rows per part, e.g. the number of rows which fit on a page.
+        index : bool, optional
+            if True, the row ranges of the parts are also written to `basename.json`. The default is False.
+        workers : int, optional
+            see `tolatex`. The default is 1.
+
+        Returns
+        -------
+        list of dict
+            the parts, with the keys 'file', 'first_row' and 'stop_row' (the row after the last row of the part).
+
+        """
+        t0 = time.perf_counter()
+        self.stats = RenderStats(self.headers)
+        colstr, all_lines, rlines, end_lines = self.__get_lines__()
+        positions = sorted(rlines)
+        headers = self.__construct_headers__(colstr, repeat=True)
+        end = r"\end{"+self.keys["tabletype"]+"}"
+        parts = []
+        ofile = None
+        def next_part():
+            if(ofile is not None):
+                ofile.write(end)
+                ofile.close()
+                parts[-1]["stop_row"] = rownr
+            parts.append({"file": "{}_part{:d}.tex".format(basename, len(parts)+1), "first_row": rownr})
+            part = open(parts[-1]["file"], 'w', buffering=self.buffer_size)
+            part.write(headers)
+            return part
+        
+        rownr = 0
+        self.__rows_per_part__ = rows_per_part #cells which span several rows must not cross the parts
+        try:
+            for lines in self.__blocks__(workers):
+                pos = 0
+                while(pos < len(lines)):
+                    if(ofile is None or rownr-parts[-1]["first_row"] == rows_per_part):
+                        ofile = next_part()
+                    n = min(len(lines)-pos, rows_per_part-(rownr-parts[-1]["first_row"]))
+                    ofile.write("".join(self.__place_lines__(lines[pos:pos+n], rownr, all_lines, rlines, positions)))
+                    pos += n
+                    rownr += n
+        finally:
+            self.__rows_per_part__ = None
+        if(ofile is None):
+            ofile = next_part()
+        ofile.write("".join(self.__footer_items__(rownr, all_lines, rlines, positions)) + "\\hline\n"*end_lines + end)
+        ofile.close()
+        parts[-1]["stop_row"] = rownr
+        
+        with open(basename + ".tex", 'w') as f:
+            for part in parts:
+                f.write("\\input{" + os.path.splitext(part["file"])[0].replace(os.sep, "/") + "}\n")
+        if(index):
+            import json
+            with open(basename + ".json", 'w') as f:
+                json.dump(parts, f, indent=1)
+        self.stats.finish(rownr, time.perf_counter()-t0)
+        self.stats["parts"] = len(parts)
+        return parts
+    
+    def __fingerprint__(self, h):
+        pass #this has to be implemented by the other classes: feeds the input data to the hash `h`
+    
+    def __cache_key__(self):
+        """
+        Returns a hash of the input data and the configuration of the table.
+        """
+        import hashlib
+        def formatter(fmt):
+            if(isinstance(fmt, (tuple, list))): #per-level index formatters
+                return [formatter(f) for f in fmt]
+            if(isinstance(fmt, Format)):
+                return repr([(k, formatter(v) if callable(v) else v) for k, v in sorted(vars(fmt).items()) if not k.startswith("_")])
+            fmt = getattr(fmt, "__wrapped__", fmt) #memoized functions
+            code = getattr(fmt, "__code__", None)
+            if(code is None):
+                return repr(fmt) if isinstance(fmt, str) else getattr(fmt, "__module__", "") + "." + getattr(fmt, "__qualname__", repr(fmt))
+            closure = [cell.cell_contents for cell in (fmt.__closure__ or ())]
+            return repr((code.co_code, code.co_consts, code.co_names, fmt.__defaults__, closure))
+        h = hashlib.sha256()
+        h.update(type(self).__name__.encode())
+        self.__fingerprint__(h)
+        config = [sorted(self.keys.items()), self.columns, self.headers, self.include_headers,
+                  [formatter(fmt) for fmt in self.formatters], formatter(getattr(self, "index_formatter", None))]
+        h.update(repr(config).encode())
+        return h.hexdigest()
+    
+    def __cached_tolatex__(self, fname, workers):
+        """
+        `tolatex` with caching, see `set_cache`.
+        """
+        import filecmp
+        import shutil
+        t0 = time.perf_counter()
+        key = self.__cache_key__()
+        cached = self.cache.get(key)
+        if(cached is None):
+            ofile, finish = self.__open__(fname)
+            with self.cache.writer(key) as cfile:
+                for chunk in self.iter_chunks(workers):
+                    ofile.write(chunk)
+                    cfile.write(chunk)
+            finish()
+            self.stats["cache"] = "miss"
+            return
+        if(not (isinstance(fname, (str, os.PathLike)) and os.path.exists(fname) and filecmp.cmp(fname, cached, shallow=False))):
+            ofile, finish = self.__open__(fname)
+            with open(cached, encoding="utf-8", newline="") as f:
+                shutil.copyfileobj(f, ofile)
+            finish()
+        self.stats = RenderStats(self.headers, cache="hit", time=time.perf_counter()-t0)
+    
+    def __render__(self, workers=1):
+        r"""
+        Lazily renders the table. Yields lists of strings: first the preamble, then the rows and
+        `\hline` separators of each block of the body and finally the closing lines.
+        """
+        t0 = time.perf_counter()
+        stats = self.stats = RenderStats(self.headers)
+        colstr, all_lines, rlines, end_lines = self.__get_lines__()
+        positions = sorted(rlines)
+        yield [self.__construct_headers__(colstr)]
+        
+        rownr = 0
+        for lines in self.__blocks__(workers):
+            if(self.profiling):
+                t1 = time.perf_counter()
+                items = self.__place_lines__(lines, rownr, all_lines, rlines, positions)
+                stats.add("lines", time.perf_counter()-t1)
+            else:
+                items = self.__place_lines__(lines, rownr, all_lines, rlines, positions)
+            yield items
+            rownr += len(lines)
+        footers = self.__footer_items__(rownr, all_lines, rlines, positions)
+        yield footers + ["\\hline\n"]*end_lines + [r"\end{"+self.keys["tabletype"]+"}"]
+        stats.finish(rownr, time.perf_counter()-t0)
+    
+    def __blocks__(self, workers=1):
+        """
+        Prepares the converter and yields the blocks of formatted rows of the body, using `workers` processes.
+        If profiling is enabled, the time spent on reading the data is recorded: the time it takes to produce a block,
+        minus the time spent on formatting it. The profiling callback is called after every block.
+        """
+        self.__runs__ = []
+        self.__totals__ = None
+        self.__style_stats__ = None
+        self.__prepare__()
+        if("sample" in self.keys):
+            blocks = self.__sample_blocks__(workers)
+        else:
+            blocks = self.__iter_blocks__() if workers<=1 else self.__parallel_blocks__(workers)
+        if(self.__aggregated__() is not None):
+            blocks = self.__aggregate_blocks__(blocks)
+        if(not self.profiling):
+            yield from blocks
+            return
+        stats = self.stats
+        while(True):
+            t0 = time.perf_counter()
+            formatting = stats.stages.get("format", [0,0])[0] + stats.stages.get("join", [0,0])[0]
+            lines = next(blocks, None)
+            if(lines is None):
+                break
+            formatting = stats.stages.get("format", [0,0])[0] + stats.stages.get("join", [0,0])[0] - formatting
+            stats.add("read", time.perf_counter()-t0-formatting)
+            yield lines
+            if(self.profile_callback is not None):
+                self.profile_callback(stats)
+    
+    def iter_chunks(self, workers=1):
+        r"""
+        Lazily yields the table as chunks of text: the preamble (`\begin{...}` and the headers),
+        one chunk per block of `chunksize` rows and finally the closing lines with `\end{...}`.
+        Together, the chunks form the output of `tolatex`. Only the blocks which are requested are formatted,
+        which allows streaming a table without keeping it in memory.
+        See `tolatex` for `workers`.
+        """
+        for items in self.__render__(workers):
+            yield "".join(items)
+    
+    def iter_rows(self, workers=1):
+        r"""
+        Lazily yields the table line by line: the preamble (`\begin{...}` and the headers), each row of the body,
+        each `\hline` separator and finally `\end{...}`. Together, the lines form the output of `tolatex`.
+        The rows are formatted in blocks of `chunksize` rows when they are needed, so the first `k` rows of
+        a huge table can be previewed with `itertools.islice(table.iter_rows(), k+1)` after a small `set_chunksize`.
+        See `tolatex` for `workers`.
+        """
+        for items in self.__render__(workers):
+            yield from items
+    
+    def __output_chunks__(self, workers=1):
+        """
+        `iter_chunks` with caching (see `set_cache`): cached tables are read from the cache in chunks,
+        other tables are rendered and added to the cache once all their chunks have been requested.
+        """
+        if(self.cache is None):
+            yield from self.iter_chunks(workers)
+            return
+        t0 = time.perf_counter()
+        key = self.__cache_key__()
+        cached = self.cache.get(key)
+        if(cached is None):
+            with self.cache.writer(key) as cfile:
+                for chunk in self.iter_chunks(workers):
+                    cfile.write(chunk)
+                    yield chunk
+            self.stats["cache"] = "miss"
+            return
+        with open(cached, encoding="utf-8", newline="") as f:
+            for chunk in iter(lambda: f.read(1024**2), ""):
+                yield chunk
+        self.stats = RenderStats(self.headers, cache="hit", time=time.perf_counter()-t0)
+
+    async def atolatex(self, stream, workers=1, executor=None):
+        """
+        Converts the data to a LaTeX table and writes it to `stream`, without blocking the asyncio event loop.
+        The chunks of `chunksize` rows (see `iter_chunks`) are rendered in `executor`, the next chunk while the
+        previous one is being written, and control returns to the event loop between the chunks.
+        The table is configured as for `tolatex` and the output is identical.
+
+        Parameters
+        ----------
+        stream : asyncio.StreamWriter or asynchronous file-like object
+            stream to which the chunks are written. Streams with a `drain` coroutine (such as `asyncio.StreamWriter`)
+            and binary streams receive UTF-8 encoded bytes, and are drained after every chunk, which bounds the memory
+            usage if the reader is slow. If `write` returns an awaitable (e.g. aiofiles), it is awaited.
+            The stream is not closed.
+        workers : int, optional
+            number of processes which format the table body, see `tolatex`. The default is 1.
+        executor : concurrent.futures.Executor, optional
+            a thread pool in which the table is rendered. The default is the default executor of the event loop.
+
+        Returns
+        -------
+        None.
+
+        """
+        import asyncio
+        import concurrent.futures
+        import inspect
+        loop = asyncio.get_running_loop()
+        binary = hasattr(stream, "drain") or "b" in str(getattr(stream, "mode", ""))
+        chunks = self.__output_chunks__(workers)
+        def step(future):
+            if(future.set_running_or_notify_cancel()):
+                try:
+                    future.set_result(next(chunks, None))
+                except BaseException as e:
+                    future.set_exception(e)
+        def submit():
+            #the future of the thread itself, which (unlike the asyncio future) is not done until the chunk is rendered
+            future = concurrent.futures.Future()
+            loop.run_in_executor(executor, step, future)
+            return future
+        pending = submit()
+        try:
+            while(True):
+                chunk = await asyncio.wrap_future(pending)
+                if(chunk is None):
+                    break
+                pending = submit()
+                t0 = time.perf_counter()
+                written = stream.write(chunk.encode("utf-8") if binary else chunk)
+                if(inspect.isawaitable(written)):
+                    await written
+                if(hasattr(stream, "drain")):
+                    await stream.drain()
+                if(self.profiling):
+                    self.stats.add("write", time.perf_counter()-t0)
+        finally:
+            #if cancelled, the generator may still be executing in the thread, and can only be closed once it is done
+            if(not pending.done()):
+                await asyncio.wait([asyncio.wrap_future(pending)])
+            chunks.close()
+
+    def to_string(self, workers=1):
+        """
+        Converts the data to a LaTeX table and returns it as a string. See `tolatex`.
+        """
+        out = io.StringIO()
+        self.tolatex(out, workers)
+        return out.getvalue()
+
+_worker_table = None
+def _init_worker(table):
+    global _worker_table
+    _worker_table = table
+
+def _format_shard(shard):
+    """
+    Formats a shard in a worker process. Returns the formatted rows and the statistics of the shard for
+    the footers and subtotals (see `__aggregating__`), which are collected by the main process.
+    """
+    lines = _worker_table.__format_shard__(shard)
+    runs = getattr(_worker_table, "__runs__", None)
+    if(not runs):
+        return lines, None
+    collected = runs[:]
+    del runs[:]
+    return lines, collected
+
+class TableCache:
+    """
+    A directory of rendered tables, keyed on a hash of their input and configuration (see `__ToLaTeX__.set_cache`).
+    When the total size exceeds `max_size` bytes, the least recently used tables are evicted.
+    """
+    def __init__(self, directory, max_size=256*1024**2):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+    
+    def path(self, key):
+        return os.path.join(self.directory, key + ".tex")
+    
+    def get(self, key):
+        """
+        Returns the path of the cached table with `key` and marks it as recently used, or None if it is not cached.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+    
+    def writer(self, key):
+        """
+        Returns a context manager which yields a text file for the table with `key`.
+        The table is only added to the cache if the context exits without an exception.
+        """
+        import tempfile
+        from contextlib import contextmanager
+        @contextmanager
+        def write():
+            #a unique file, as several threads or processes may write the same table at once (e.g. `convert_batch`)
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(fd, 'w', encoding="utf-8", newline="") as f:
+                    yield f
+                os.replace(tmp, self.path(key))
+            finally:
+                if(os.path.exists(tmp)):
+                    os.remove(tmp)
+            self.evict()
+        return write()
+    
+    def evict(self):
+        """
+        Removes the least recently used tables until the cache is smaller than `max_size`.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if(entry.name.endswith(".tex")):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, path in sorted(entries):
+            if(size <= self.max_size):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError: #evicted by another writer
+                pass
+            size -= entry_size
+        
+class CSVToLaTeX(__ToLaTeX__):
+    def __init__(self, fname : str, ncols=None, header=False, numeric=False, **kwargs):
+        """
+        Creates the CSVToLaTeX object. Remember to close the object with `.close()` to close the csv input stream.
+        
+        Parameters
+        ----------
+        fname : string
+            name of the input csv file.
+        ncols : int, optional
             number of columns. This and/or `header` has to be given. The default is None.
         header : boolean, optional
             if True, the first line of the csv file is interpreted as a list of headers (column titles).
             The amount of columns is inferred from the number of elements in this list. This or `ncols` has to be given. 
             If they are both given, the number of headers has to match `ncols`. The default is False.
+        numeric : boolean, optional
+            if True, the file is read in a fast mode for purely numeric csv files: it is memory-mapped and parsed
+            in blocks directly into numpy arrays, as in `MatrixToLaTeX`. Columns with the default `str` formatter
+            are copied from the file without being parsed, other formatters receive floats instead of strings.
+            Only the `delimiter` argument of csv.reader is supported in this mode; quoted fields are not.
+            The default is False.
         **kwargs : key-value arguments
             arguments which are passed on to csv.reader().
 
@@ -311,11 +1965,14 @@ class CSVToLaTeX(__ToLaTeX__):
         None.
 
         """
-        import csv
         if(ncols is None and header==False):
             raise ValueError("If the file does not include a header, please provide the number of columns")
         self.file = open(fname)
         self.reader = csv.reader(self.file, **kwargs)
+        self.reader_kwargs = kwargs
+        self.header = header
+        self.numeric = numeric
+        self.__mmap__ = None
         if(header):
             headers = list(next(self.reader))
             try:
@@ -329,35 +1986,263 @@ class CSVToLaTeX(__ToLaTeX__):
         else:
             super().__init__(ncols)
             
-    def tolatex(self, fname):
-        ofile = open(fname, 'w')
-        colstr, all_lines, rlines = self.__get_lines__()
-        headers = self.__construct_headers__(colstr)
-        ofile.write(headers)
-        endline = r"\\" + "\n"
+    def __rewind__(self):
+        """
+        Positions the reader at the first data row, such that the table can be rendered more than once.
+        """
+        self.file.seek(0)
+        self.reader = csv.reader(self.file, **self.reader_kwargs)
+        if(self.header):
+            next(self.reader)
+            
+    def __fingerprint__(self, h):
+        with open(self.file.name, 'rb') as f:
+            for block in iter(lambda: f.read(1<<20), b""):
+                h.update(block)
+        h.update(repr((self.header, self.numeric, sorted(self.reader_kwargs.items()))).encode())
+    
+    def __column_stats__(self, columns):
+        """
+        Returns the smallest and largest number of each of `columns`, computed in a separate pass over the file,
+        which is read in blocks of `chunksize` rows so the memory usage does not depend on the size of the file.
+        """
+        lo = np.full(len(columns), np.nan)
+        hi = np.full(len(columns), np.nan)
+        self.__rewind__()
+        while(True):
+            rows = list(islice(self.reader, self.chunksize))
+            if(len(rows)==0):
+                break
+            rows = [row for row in rows if row]
+            for k, i in enumerate(columns):
+                block = _extrema(_floats([row[i] for row in rows]))
+                lo[k] = np.fmin(lo[k], block[0])
+                hi[k] = np.fmax(hi[k], block[1])
+        return {i: (float(lo[k]), float(hi[k])) for k, i in enumerate(columns)}
         
-        rownr = 0
-        idx = 0
-        for row in self.reader:
-            line = " & ".join([self.formatters[i](row[i]) for i in range(self.ncols)])
-            ofile.write(line + endline)
-            if(all_lines):
-                ofile.write("\\hline\n")
+    def __prepare__(self):
+        if(self.numeric):
+            self.__format_rows__ = self.__row_formatter__(self.formatters, style=self.__styler__())
+            self.__raw__ = [fmt is str for fmt in self.formatters]
+        else:
+            self.__format_rows__ = self.__row_formatter__(self.formatters, parse=float, style=self.__styler__())
+            self.__rewind__()
+    
+    def __iter_blocks__(self):
+        """
+        Streams the csv file in chunks of `chunksize` rows, so the memory usage does not depend on the size of the file.
+        In numeric mode, the chunks are the byte ranges of `__shards__`.
+        """
+        if(self.numeric):
+            yield from super().__iter_blocks__()
+            return
+        while(True):
+            rows = list(islice(self.reader, self.chunksize))
+            if(len(rows)==0):
+                break
+            yield self.__format_parsed__(rows)
+    
+    def __shards__(self):
+        """
+        Splits the body of the csv file into byte ranges of roughly `chunksize` rows, aligned to the line endings.
+        Each worker only reads its own range. Note that this does not support quoted fields containing line breaks,
+        these raise a ValueError.
+        """
+        with open(self.file.name, 'rb') as f:
+            if(self.header):
+                f.readline()
+            start = f.tell()
+            yield from self.__byte_ranges__(f, start, f.seek(0, 2))
+    
+    def __byte_ranges__(self, f, start, stop):
+        """
+        Splits the bytes `start` to `stop` of the binary file `f` into ranges of roughly `chunksize` rows, using the
+        average length of the lines in a sample. `start` and `stop` have to be at the start of a line.
+        """
+        f.seek(start)
+        sample = f.read(min(1<<16, stop-start))
+        step = max(1, int(len(sample)/max(1, sample.count(b"\n"))*self.chunksize))
+        while(start < stop):
+            f.seek(min(start+step, stop)-1)
+            f.readline()
+            end = min(f.tell(), stop)
+            yield (start, end)
+            start = end
+    
+    def __format_shard__(self, shard):
+        if(self.__mmap__ is None):
+            import mmap
+            self.__mmap__ = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        text = self.__mmap__[shard[0]:shard[1]].decode(self.file.encoding)
+        if(self.numeric):
+            return self.__format_numeric__(text)
+        reader = csv.reader(io.StringIO(text), **self.reader_kwargs)
+        rows = list(reader)
+        #a quoted field spans several lines, or the range ends inside one (the field then keeps the line break)
+        if(reader.line_num != len(rows) or (rows and rows[-1] and rows[-1][-1].endswith("\n"))):
+            raise ValueError("Quoted fields containing line breaks are not supported with more than one worker")
+        return self.__format_parsed__(rows)
+    
+    def __sample_blocks__(self, workers=1):
+        """
+        Yields the blocks of formatted rows of the sample (see `set_sample`), reading as little of the file as possible.
+        The head is read from the start and the tail backwards from the end of the file, so the rows in between
+        are not read at all. If the head or the tail contains a quote character, the whole file is parsed instead,
+        as quoted fields may contain line breaks. The other samples
+        are read in a single pass, two for random samples, which first count the rows. Only the selected rows are
+        parsed into blocks and formatted. The file is always read by a single process.
+        """
+        sample = self.keys["sample"]
+        if(sample["every"] is None and sample["random"] is None):
+            yield from self.__head_tail__(sample["head"] or 0, sample["tail"] or 0)
+            return
+        if(sample["every"] is not None):
+            self.__rewind__()
+            rows = islice(self.reader, 0, None, sample["every"])
+        else:
+            rows = self.__random_rows__(sample["random"], sample["by"], sample["seed"])
+        while(True):
+            block = list(islice(rows, self.chunksize))
+            if(len(block)==0):
+                break
+            yield self.__format_parsed__(block)
+    
+    def __head_tail__(self, head, tail):
+        """
+        Yields the blocks of the first `head` and the last `tail` rows of the file, and an ellipsis row between them
+        if any rows are skipped.
+        """
+        with open(self.file.name, 'rb') as f:
+            if(self.header):
+                f.readline()
+            start = f.tell()
+            for _ in range(head):
+                if(not f.readline()):
+                    break
+            head_stop = f.tell()
+            tail_start, stop = _tail_offset(f, start, tail)
+            quote = self.reader_kwargs.get("quotechar", '"').encode(self.file.encoding)
+            quoted = False
+            for part_start, part_stop in ((start, head_stop), (tail_start, stop)):
+                f.seek(part_start)
+                quoted |= quote in f.read(max(0, part_stop-part_start))
+            if(quoted):
+                yield from self.__head_tail_rows__(head, tail)
+                return
+            if(tail_start <= head_stop):
+                ranges = [(start, stop)]
             else:
-                while(idx < len(rlines) and rownr == rlines[idx]):
-                    idx += 1
-                    ofile.write("\\hline\n")
-            rownr += 1
-        idx = -1
-        while(rlines[-1]==-1):
-            ofile.write("\\hline\n")
-            idx -= 1
-            
-        ofile.write(r"\end{"+self.keys["tabletype"]+"}")
-        ofile.close()
+                ranges = [(start, min(head_stop, stop)), None, (tail_start, stop)]
+            for part in ranges:
+                if(part is None):
+                    yield self.__ellipsis__()
+                else:
+                    for shard in self.__byte_ranges__(f, *part):
+                        yield self.__format_shard__(shard)
+    
+    def __head_tail_rows__(self, head, tail):
+        """
+        Version of `__head_tail__` which parses the whole file with the csv reader, for quoted fields containing
+        line breaks. Only the head and the tail are kept in memory and formatted.
+        """
+        from collections import deque
+        self.__rewind__()
+        rows = (row for row in self.reader if row)
+        first = list(islice(rows, head))
+        last = deque(maxlen=tail)
+        skipped = 0
+        for row in rows:
+            if(len(last)==tail):
+                skipped += 1
+            last.append(row)
+        parts = [first, None, list(last)] if skipped else [first + list(last)]
+        for part in parts:
+            if(part is None):
+                yield self.__ellipsis__()
+            else:
+                for i in range(0, len(part), self.chunksize):
+                    yield self.__format_parsed__(part[i:i+self.chunksize])
+    
+    def __random_rows__(self, n, by, seed):
+        """
+        Yields a random sample of `n` parsed rows, in two passes over the file: the first counts the rows
+        (of every value of column `by`, if given), the second yields the selected rows.
+        """
+        key = (lambda row: None) if by is None else (lambda row: row[by])
+        counts = dict()
+        self.__rewind__()
+        for row in self.reader:
+            if(row):
+                value = key(row)
+                counts[value] = counts.get(value, 0)+1
+        rng = np.random.default_rng(seed)
+        selected = {value: set(rng.choice(count, quota, replace=False).tolist())
+                    for (value, count), quota in zip(counts.items(), _allocate(list(counts.values()), n))}
+        seen = dict.fromkeys(counts, 0)
+        self.__rewind__()
+        for row in self.reader:
+            if(row):
+                value = key(row)
+                if(seen[value] in selected[value]):
+                    yield row
+                seen[value] += 1
+    
+    def __format_parsed__(self, rows):
+        """
+        Formats a block of rows which were parsed by the csv reader. Empty rows are skipped.
+        """
+        rows = [row for row in rows if row]
+        if(len(rows)==0):
+            return []
+        if(self.numeric):
+            delimiter = self.reader_kwargs.get("delimiter", ",")
+            return self.__format_numeric__("\n".join([delimiter.join(row) for row in rows]))
+        return self.__format_rows__(list(zip(*rows)))
+    
+    def __format_numeric__(self, text):
+        """
+        Formats the rows in `text` in numeric mode. The fields are parsed into a numpy array with a single call.
+        If all columns use the `str` formatter, the lines are copied with the delimiters replaced.
+        """
+        import warnings
+        if("\r" in text):
+            text = text.replace("\r", "")
+        if("\n\n" in text): #blank lines are skipped, as by the csv reader
+            text = "\n".join([line for line in text.split("\n") if line])
+        text = text.strip("\n")
+        if(len(text)==0):
+            return []
+        nrows = text.count("\n")+1
+        delimiter = self.reader_kwargs.get("delimiter", ",")
+        if(text.count(delimiter) != nrows*(self.ncols-1)):
+            raise ValueError("Expected {:d} fields in every row of the numeric csv file".format(self.ncols))
+        if(all(self.__raw__) and self.__aggregated__() is None and "styles" not in self.keys):
+            return text.replace(delimiter, " & ").split("\n")
+        text = text.replace("\n", delimiter)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                values = np.fromstring(text, sep=delimiter)
+        except ValueError:
+            values = None
+        if(values is None or values.size != nrows*self.ncols):
+            raise ValueError("The csv file contains non-numeric fields, which are not supported in numeric mode")
+        values = values.reshape(nrows, self.ncols)
+        columns = [values[:,i] for i in range(self.ncols)]
+        if(any(self.__raw__)):
+            fields = text.split(delimiter)
+            for i in range(self.ncols):
+                if(self.__raw__[i]):
+                    columns[i] = fields[i::self.ncols]
+        return self.__format_rows__(columns)
     
     def close(self):
-         self.file.close()
+         #the constructor may have failed before the file was opened
+         if(getattr(self, "__mmap__", None) is not None):
+             self.__mmap__.close()
+             self.__mmap__ = None
+         if(hasattr(self, "file")):
+             self.file.close()
          
     def __del__(self):
         self.close()
@@ -368,39 +2253,36 @@ class MatrixToLaTeX(__ToLaTeX__):
             raise ValueError("Expected dataset of dimension 2, got " + str(len(data.shape)))
         super().__init__(data.shape[1], headers)
         self.data = data
+        self.nrows = data.shape[0]
     
-    def tolatex(self, fname):
-        ofile = open(fname, 'w')
-        colstr, all_lines, rlines = self.__get_lines__()
-        headers = self.__construct_headers__(colstr)
-        ofile.write(headers)
-        endline = r"\\" + "\n"
-        
-        rownr = 0
-        idx = 0
-        for row_idx in range(self.data.shape[0]):
-            line = " & ".join([self.formatters[i](self.data[row_idx,i]) for i in range(self.ncols)])
-            ofile.write(line + endline)
-            if(all_lines):
-                ofile.write("\\hline\n")
-            else:
-                while(idx < len(rlines) and rownr == rlines[idx]):
-                    idx += 1
-                    ofile.write("\\hline\n")
-            rownr += 1
-        idx = -1
-        while(rlines[idx]==-1):
-            ofile.write("\\hline\n")
-            idx -= 1
-            
-        ofile.write(r"\end{"+self.keys["tabletype"]+"}")
-        ofile.close()
+    def __fingerprint__(self, h):
+        h.update(repr((self.data.dtype, self.data.shape)).encode())
+        if(self.data.dtype.hasobject):
+            h.update(repr(self.data.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(self.data).view(np.uint8))
+    
+    def __subset__(self, rows):
+        import copy
+        table = copy.copy(self)
+        table.data = self.data[rows]
+        table.nrows = table.data.shape[0]
+        return table
+    
+    def __column__(self, by):
+        return self.data[:,by]
+    
+    def __format_shard__(self, shard):
+        block = self.data[shard[0]:shard[1]]
+        return self.__format_rows__([block[:,i] for i in range(self.ncols)])
         
 class DataFrameToLaTeX(__ToLaTeX__):
-    """
+    r"""
     Class providing functionalities to convert a Pandas DataFrame to a LaTeX table.
     This class inherits all functionalities of `__ToLaTeX__` and adds the function
     `set_index_formatter`: a setter for the formatter of the index of the dataframe.
+    MultiIndex columns are rendered as grouped headers (see `set_header_levels`) and the levels of a MultiIndex
+    index as columns, in which consecutive equal values are merged with `\multirow` (see `set_index_spans`).
     """
     def __init__(self, df, include_headers=True, include_index=True, headers=None):
         """
@@ -413,97 +2295,220 @@ class DataFrameToLaTeX(__ToLaTeX__):
         include_headers : bool, optional
             Whether or not the headers of the DataFrame should be included in the table. The default is True.
         include_index : bool, optional
-            Whether or not the index of the DataFrame should be included in the table before the first column. The default is True.
+            Whether or not the index of the DataFrame should be included in the table before the first column.
+            Every level of a MultiIndex is a column of its own. The default is True.
         headers : list of strings, optional
-            If provided, these overwrite the column names of the DataFrame as the table header. The default is None.
-
+            If provided, these overwrite the column names of the DataFrame as the table header.
+            For MultiIndex columns, these replace the lowest level. The default is None.
+    
         Raises
         ------
         ValueError
             If the dataframe is not 2 dimensional or the length of `headers` does not match the number of columns
-
+    
         Returns
         -------
         None.
-
+    
         """
         if(df.ndim!=2):
             raise ValueError("Expected dataframe of dimension 2, got " + str(df.ndim))
-        ncols = df.shape[1]
-        if(include_index): ncols += 1
+        self.index_levels = df.index.nlevels if include_index else 0
+        ncols = df.shape[1] + self.index_levels
+        index_names = [""]
+        if(self.index_levels > 1):
+            index_names = ["" if name is None else str(name) for name in df.index.names]
         if(headers is None):
-            headers = [str(c) for c in df.columns]
+            headers = [str(c) for c in df.columns.get_level_values(-1)]
             if(include_index):
-                headers = [""] + headers
+                headers = index_names + headers
         else:
             if(len(headers)!=ncols):
-                if(len(headers)==ncols-1):
-                    headers = [""] + headers
+                if(len(headers)==ncols-self.index_levels):
+                    headers = [""]*self.index_levels + list(headers)
                 else:
                     raise ValueError("Number of given headers does not match number of columns")
         super().__init__(ncols, headers)
         self.set_include_headers(include_headers)
         self.include_index = include_index
         self.df = df
+        self.nrows = df.shape[0]
         if(include_index):
             self.index_formatter = str
-        
+        if(df.columns.nlevels > 1):
+            self.set_header_levels([[""]*self.index_levels + list(df.columns.get_level_values(i)) for i in range(df.columns.nlevels-1)])
+    
     def set_index_formatter(self, fmt):
         """
         Sets the formatter of the index column
-
+        
         Parameters
         ----------
-        fmt : lambda or function
+        fmt : lambda, function, str, Format or list
             the formatting function. It should take a single input (the index) and produce a string output.
-
+            Alternatively, a format specification or a `Format` (see `set_formatters`).
+            For a MultiIndex, a list with one formatter per level can be given.
+    
         Returns
         -------
         None.
-
+    
         """
+        if(isinstance(fmt, (tuple, list)) and len(fmt)!=self.df.index.nlevels):
+            raise ValueError("Number of formatters does not match the number of index levels")
         self.index_formatter = fmt
+    
+    def set_index_spans(self, levels):
+        r"""
+        Sets the levels of the index in which consecutive equal values are merged into a single cell (`\multirow`,
+        which requires the multirow package). A run of equal values also ends where a run of a level before it ends.
+        By default, all levels of a MultiIndex except the last one are merged, and a flat index is not merged.
+        The runs are computed once per rendering, before the rows are formatted, so the table is still rendered in blocks.
         
-    def tolatex(self, fname):
-        ofile = open(fname, 'w')
-        colstr, all_lines, rlines = self.__get_lines__()
-        headers = self.__construct_headers__(colstr)
-        ofile.write(headers)
-        endline = r"\\" + "\n"
+        Parameters
+        ----------
+        levels : list of int or bool
+            the indices of the merged levels, True for all levels or False for none.
+    
+        Returns
+        -------
+        None.
+    
+        """
+        self.keys["index_spans"] = levels
+    
+    def __index_formatters__(self):
+        """
+        Returns the formatter of every level of the index.
+        """
+        if(isinstance(self.index_formatter, (tuple, list))):
+            return list(self.index_formatter)
+        return [self.index_formatter]*self.index_levels
+    
+    def __index_runs__(self):
+        """
+        Returns the layout of the merged index cells: a dictionary which maps every merged level (see `set_index_spans`)
+        to the first rows of its runs of equal values and their lengths, as numpy arrays. The runs also end at the
+        groups of the subtotals (see `set_subtotals`) and at the ends of the parts of `tolatex_parts`.
+        """
+        levels = self.keys.get("index_spans", range(self.index_levels-1))
+        if(isinstance(levels, bool)):
+            levels = range(self.index_levels) if levels else []
+        levels = {i%self.index_levels for i in levels}
+        runs = dict()
+        if(not levels or self.nrows == 0):
+            return runs
+        index = self.df.index
+        change = np.zeros(self.nrows, dtype=bool)
+        change[0] = True
+        lines = np.arange(self.nrows) #the number of the line of every row, counting the subtotal rows before it
+        if("subtotals" in self.keys):
+            subtotals = self.keys["subtotals"]
+            by = subtotals["by"]%self.ncols
+            values = np.asarray(index.get_level_values(by) if by < self.index_levels else self.df.iloc[:,by-self.index_levels])
+            groups = values[1:] != values[:-1]
+            change[1:] |= groups
+            lines[1:] += len(subtotals["aggregates"])*np.cumsum(groups)
+        rows_per_part = getattr(self, "__rows_per_part__", None)
+        if(rows_per_part):
+            parts = lines//rows_per_part
+            change[1:] |= parts[1:] != parts[:-1]
+        for level in range(max(levels)+1):
+            codes = index.codes[level] if self.index_levels > 1 else index.factorize()[0]
+            change[1:] |= codes[1:] != codes[:-1]
+            if(level in levels):
+                starts = np.flatnonzero(change)
+                runs[level] = (starts, np.diff(np.append(starts, self.nrows)))
+        return runs
+    
+    def __data_columns__(self):
+        return range(self.index_levels, self.ncols)
+    
+    def __column_values__(self, col):
+        """
+        Prepares the Series or Index `col` for columnar rendering. Numeric columns are extracted as a
+        numpy array once. Other columns (datetime, categorical, object, ...) are returned as pandas arrays,
+        blocks of them are converted with `tolist()`, which yields the same values as `iloc`.
+        """
+        if(isinstance(col.dtype, np.dtype) and col.dtype.kind in "biufc"):
+            return col.to_numpy()
+        return col.array
         
-        rownr = 0
-        idx = 0
-        for row_idx in range(self.df.shape[0]):
-            line = " & ".join([self.formatters[i](self.df.iloc[row_idx,i]) for i in range(self.df.shape[1])])
-            if(self.include_index):
-                line = self.index_formatter(self.df.index[row_idx]) + " & " + line
-            ofile.write(line + endline)
-            if(all_lines):
-                ofile.write("\\hline\n")
-            else:
-                while(idx < len(rlines) and rownr == rlines[idx]):
-                    idx += 1
-                    ofile.write("\\hline\n")
-            rownr += 1
-        idx = -1
-        while(rlines[idx]==-1):
-            ofile.write("\\hline\n")
-            idx -= 1
-            
-        ofile.write(r"\end{"+self.keys["tabletype"]+"}")
-        ofile.close()
+    def __fingerprint__(self, h):
+        from pandas.util import hash_pandas_object
+        h.update(repr((list(self.df.columns), list(self.df.dtypes), self.include_index)).encode())
+        h.update(hash_pandas_object(self.df, index=True).to_numpy())
+        
+    def __subset__(self, rows):
+        import copy
+        table = copy.copy(self)
+        table.df = self.df.iloc[rows]
+        table.nrows = table.df.shape[0]
+        return table
+    
+    def __column__(self, by):
+        return self.df.iloc[:,by].to_numpy()
+    
+    def __position__(self, name):
+        return list(self.df.columns).index(name)
+        
+    def __prepare__(self):
+        formatters = self.formatters[:self.df.shape[1]]
+        escape = self.__escaped__()[:self.df.shape[1]]
+        self.__columns__ = [self.__column_values__(self.df.iloc[:,i]) for i in range(self.df.shape[1])]
+        self.__merged__ = dict()
+        if(self.include_index):
+            index = self.__index_formatters__()
+            self.__merged__ = self.__index_runs__()
+            self.__labels__ = {level: self.__row_formatter__([index[level]], escape=[False], aggregate=False) for level in self.__merged__}
+            #the cells of merged levels are formatted by `__merge_cells__`
+            formatters = ["{}" if level in self.__merged__ else fmt for level, fmt in enumerate(index)] + formatters
+            escape = [False]*self.index_levels + escape
+            self.__columns__ = [self.__column_values__(self.df.index.get_level_values(i)) for i in range(self.index_levels)] + self.__columns__
+        self.__format_rows__ = self.__row_formatter__(formatters, escape=escape, aggregate=not self.__merged__,
+                                                      style=self.__styler__(self.index_levels))
+        if(self.__merged__):
+            #the statistics of footers and subtotals are collected from the index values, rather than the merged cells
+            self.__collect__ = self.__aggregating__(lambda columns: None, index + formatters[self.index_levels:], None, escape)
+    
+    def __merge_cells__(self, level, values, start, stop):
+        r"""
+        Returns the cells of the merged index `level` in the rows `start` to `stop`, given its `values` in these rows:
+        the first row of every run of equal values is a `\multirow` over the whole run, the other rows are empty.
+        """
+        starts, lengths = self.__merged__[level]
+        first, last = np.searchsorted(starts, (start, stop))
+        rows = (starts[first:last]-start).tolist()
+        labels = self.__labels__[level]([values[starts[first:last]-start] if _is_array(values) else [values[row] for row in rows]])
+        cells = [""]*(stop-start)
+        for row, n, label in zip(rows, lengths[first:last].tolist(), labels):
+            cells[row] = label if n == 1 else r"\multirow{{{:d}}}{{*}}{{{}}}".format(n, label)
+        return cells
+    
+    def __format_shard__(self, shard):
+        start, stop = shard
+        columns = [col[start:stop] if isinstance(col, np.ndarray) else col[start:stop].tolist() for col in self.__columns__]
+        if(self.__merged__):
+            self.__collect__(columns)
+            for level in self.__merged__:
+                columns[level] = self.__merge_cells__(level, columns[level], start, stop)
+        return self.__format_rows__(columns)
         
 class ListToLaTeX(__ToLaTeX__):
     """
     Class providing functionalities to convert a list of lists to a LaTeX table.
     This class inherits all functionalities of `__ToLaTeX__`.
+    The rows can also be given by any iterable, such as a generator, which is then read in blocks of `chunksize` rows
+    while the table is rendered, so the rows never have to be in memory all at once.
     """
     def __init__(self, data, ncols, has_headers=True, headers=None):
         """
         Parameters
         ----------
-        data : list of lists
-            a list of the data rows
+        data : list of lists or iterable
+            a list of the data rows, or an iterable (e.g. a generator) of rows. An iterable which is not a sequence
+            can be rendered only once; sampling (see `set_sample`), styles (see `set_styles`) and caching (see `set_cache`)
+            read it into a list.
         ncols : int
             number of columns
         include_headers : bool, optional
@@ -515,45 +2520,666 @@ class ListToLaTeX(__ToLaTeX__):
         None.
 
         """
-        if(type(data) is not list):
-            raise ValueError("Expected data fo be a list")
+        from collections.abc import Sequence
+        if(not isinstance(data, Sequence)):
+            data = iter(data)
         self.idx = 0
         if(headers is None):    
             if(has_headers):
-                headers = data[0]
-                self.idx = 1
+                if(isinstance(data, Sequence)):
+                    headers = data[0]
+                    self.idx = 1
+                else:
+                    headers = next(data, None)
+                    if(headers is None):
+                        raise ValueError("Expected the first row to contain the headers")
         if(headers is not None):
             if(len(headers)!=ncols):
                 raise ValueError("Number of given headers does not match number of columns")
         super().__init__(ncols, headers)
         self.data = data
+        self.nrows = len(data)-self.idx if isinstance(data, Sequence) else None
+        self.consumed = False
         
-    def tolatex(self, fname):
-        ofile = open(fname, 'w')
-        colstr, all_lines, rlines = self.__get_lines__()
-        headers = self.__construct_headers__(colstr)
-        ofile.write(headers)
-        endline = r"\\" + "\n"
+    def __materialize__(self):
+        """
+        Reads rows which are given by an iterator into a list, for the functionalities which need all rows.
+        """
+        if(self.nrows is None):
+            self.data = list(self.data)
+            self.nrows = len(self.data)
         
-        if(self.idx==1): self.data = self.data[1:]
-        rownr = 0
-        idx = 0
-        for row in self.data:
-            line = " & ".join([self.formatters[i](row[i]) for i in range(min(self.ncols, len(row)))])
-            if(len(row)<self.ncols):
-                line += " & "*(self.ncols-len(row))
-            ofile.write(line + endline)
-            if(all_lines):
-                ofile.write("\\hline\n")
+    def __fingerprint__(self, h):
+        import pickle
+        self.__materialize__()
+        h.update(repr(self.idx).encode())
+        try:
+            h.update(pickle.dumps(self.data, protocol=4))
+        except Exception:
+            h.update(repr(self.data).encode())
+        
+    def __subset__(self, rows):
+        import copy
+        table = copy.copy(self)
+        if(isinstance(rows, slice)):
+            rows = range(self.nrows)[rows]
+            table.data = self.data[self.idx+rows.start:self.idx+rows.stop:rows.step]
+        else:
+            table.data = [self.data[self.idx+i] for i in rows]
+        table.idx = 0
+        table.nrows = len(table.data)
+        return table
+    
+    def __column__(self, by):
+        #missing cells of short rows are NaN, like the cells which are not numbers
+        return [row[by] if by < len(row) else np.nan for row in islice(self.data, self.idx, None)]
+        
+    def __prepare__(self):
+        if("sample" in self.keys or "styles" in self.keys):
+            self.__materialize__()
+        super().__prepare__()
+        self.__ragged__ = dict()
+        self.__ragged_styler__ = self.__styler__()
+        self.__ragged_marks__ = dict()
+        
+    def __shards__(self):
+        """
+        Returns ranges of `chunksize` rows, or, if the rows are given by an iterator, the blocks of rows themselves.
+        """
+        if(self.nrows is not None):
+            return super().__shards__()
+        if(self.consumed):
+            raise ValueError("The rows of this table are given by an iterator, which has already been rendered")
+        self.consumed = True
+        return iter(lambda: list(islice(self.data, self.chunksize)), [])
+        
+    def __format_shard__(self, shard):
+        rows = shard if isinstance(shard, list) else self.data[self.idx+shard[0]:self.idx+shard[1]]
+        if(all(len(row)>=self.ncols for row in rows)):
+            return self.__format_rows__(list(zip(*rows)))
+        return self.__format_ragged__(rows)
+    
+    def __format_ragged__(self, rows):
+        """
+        Formats a block which contains rows with less than `ncols` cells. The rows with the same number of cells are
+        formatted together, by the formatters of their columns, and the missing cells are left empty. The statistics
+        of the footers and subtotals and the styles are computed on the whole block, in which the missing cells are NaN.
+        """
+        columns = [[row[i] if i < len(row) else np.nan for row in rows] for i in range(self.ncols)]
+        aggregated = self.__aggregated__()
+        if(aggregated is not None):
+            by = self.keys["subtotals"]["by"] if "subtotals" in self.keys else None
+            self.__runs__.extend(_block_stats(columns, aggregated, by))
+        styler = self.__ragged_styler__
+        marks = styler[1](columns) if styler is not None else dict()
+        groups = dict()
+        for i, row in enumerate(rows):
+            groups.setdefault(min(len(row), self.ncols), []).append(i)
+        lines = [None]*len(rows)
+        for n, positions in groups.items():
+            padding = " & "*(self.ncols-max(n, 1))
+            if(n == 0):
+                formatted = [""]*len(positions)
             else:
-                while(idx < len(rlines) and rownr == rlines[idx]):
-                    idx += 1
-                    ofile.write("\\hline\n")
-            rownr += 1
-        idx = -1
-        while(rlines[idx]==-1):
-            ofile.write("\\hline\n")
-            idx -= 1
-            
-        ofile.write(r"\end{"+self.keys["tabletype"]+"}")
-        ofile.close()
\ No newline at end of file
+                if(n not in self.__ragged__):
+                    style = None
+                    if(styler is not None):
+                        style = ({i for i in styler[0] if i < n}, lambda columns: self.__ragged_marks__)
+                    self.__ragged__[n] = self.__row_formatter__(self.formatters[:n], escape=self.__escaped__()[:n],
+                                                                aggregate=False, style=style)
+                self.__ragged_marks__ = _select_marks(marks, positions)
+                formatted = self.__ragged__[n](list(zip(*[rows[i] for i in positions])))
+            for i, line in zip(positions, formatted):
+                lines[i] = line + padding
+        return lines
+
+def _select_marks(marks, positions):
+    """
+    Returns the styles of the cells (see `__styler__`) of the rows `positions` of a block, numbered as in the selection.
+    """
+    index = {row: k for k, row in enumerate(positions)}
+    selected = dict()
+    for i, column_marks in marks.items():
+        for rows, commands in column_marks:
+            kept = [k for k, row in enumerate(rows) if row in index]
+            selected.setdefault(i, []).append(([index[rows[k]] for k in kept],
+                                               commands if isinstance(commands, str) else [commands[k] for k in kept]))
+    return selected
+
+def _load_npy(fname, key=None):
+    """
+    Memory-maps the array of the .npy file `fname`, or the array `key` (by default the first array) of the .npz
+    archive `fname`. Arrays in compressed archives (`np.savez_compressed`) cannot be memory-mapped and are loaded.
+    """
+    if(not str(fname).lower().endswith(".npz")):
+        return np.load(fname, mmap_mode="r")
+    import zipfile
+    with zipfile.ZipFile(fname) as archive:
+        name = [name for name in archive.namelist() if name.endswith(".npy")][0] if key is None else key + ".npy"
+        info = archive.getinfo(name)
+    if(info.compress_type != zipfile.ZIP_STORED):
+        with np.load(fname) as archive:
+            return archive[name[:-4]]
+    with open(fname, 'rb') as f:
+        #the data of a stored member follows its local file header, whose length depends on the name and extra field
+        f.seek(info.header_offset)
+        local = f.read(30)
+        f.seek(info.header_offset + 30 + int.from_bytes(local[26:28], "little") + int.from_bytes(local[28:30], "little"))
+        version = np.lib.format.read_magic(f)
+        if(version == (1, 0)):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        elif(version == (2, 0)):
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            shape, fortran, dtype = None, False, np.dtype(object)
+        offset = f.tell()
+    if(dtype.hasobject):
+        with np.load(fname, allow_pickle=True) as archive:
+            return archive[name[:-4]]
+    return np.memmap(fname, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran else "C")
+
+class NpyToLaTeX(MatrixToLaTeX):
+    """
+    Class providing functionalities to convert a numpy file (.npy, or an array in a .npz archive) to a LaTeX table.
+    This class inherits all functionalities of `MatrixToLaTeX`. The file is memory-mapped, so only the requested
+    rows and columns are read, a block at a time. The array is either 2 dimensional, or a 1 dimensional structured
+    array whose fields are the columns (the field names are then the default headers).
+    """
+    def __init__(self, fname, key=None, usecols=None, rows=None, headers=None):
+        """
+        Parameters
+        ----------
+        fname : str
+            name of the .npy or .npz file.
+        key : str, optional
+            name of the array in a .npz archive. The default is the first array.
+        usecols : list of int or str, optional
+            the columns which are rendered, as indices or (for structured arrays) field names. The default is all columns.
+        rows : tuple of int, optional
+            the range (start, stop) of the rows which are rendered. The default is all rows.
+        headers : list of strings, optional
+            the headers of the table. The default is None.
+
+        Raises
+        ------
+        ValueError
+            If the array is not 2 dimensional or structured.
+
+        Returns
+        -------
+        None.
+
+        """
+        data = _load_npy(fname, key)
+        fields = data.dtype.names
+        if(fields is not None and data.ndim == 1):
+            usecols = list(fields) if usecols is None else [fields[c] if isinstance(c, int) else c for c in usecols]
+            if(headers is None):
+                headers = usecols
+        elif(data.ndim == 2 and fields is None):
+            usecols = list(range(data.shape[1])) if usecols is None else [c%data.shape[1] for c in usecols]
+        else:
+            raise ValueError("Expected a 2 dimensional or a structured array, got shape " + str(data.shape))
+        if(rows is not None):
+            data = data[rows[0]:rows[1]]
+        __ToLaTeX__.__init__(self, len(usecols), headers)
+        self.fname = fname
+        self.key = key
+        self.usecols = usecols
+        self.rows = rows
+        self.data = data
+        self.nrows = data.shape[0]
+    
+    def __block_columns__(self, block):
+        if(self.data.dtype.names is not None):
+            return [block[name] for name in self.usecols]
+        return [block[:,i] for i in self.usecols]
+    
+    def __fingerprint__(self, h):
+        #the file is identified by its size and modification time, rather than by reading all of it
+        stat = os.stat(self.fname)
+        h.update(repr((os.path.abspath(self.fname), stat.st_size, stat.st_mtime_ns, self.key, self.usecols, self.rows)).encode())
+    
+    def __column__(self, by):
+        return self.__block_columns__(self.data)[by]
+    
+    def __format_shard__(self, shard):
+        return self.__format_rows__(self.__block_columns__(self.data[shard[0]:shard[1]]))
+    
+    def close(self):
+        """
+        Releases the memory map of the file.
+        """
+        self.data = None
+
+class ArrowToLaTeX(__ToLaTeX__):
+    """
+    Class providing functionalities to convert Apache Arrow data to a LaTeX table: Parquet files (.parquet, .pq),
+    Feather and Arrow IPC files (.feather, .arrow, .ipc), Arrow IPC streams (.arrows) and pyarrow Tables.
+    This class inherits all functionalities of `__ToLaTeX__` and requires pyarrow.
+    The data is read in pieces (the row groups of a Parquet file, the record batches of an IPC file), and only
+    the pieces which contain the requested rows are read, with only the requested columns. Files are memory-mapped.
+    """
+    def __init__(self, source, usecols=None, rows=None, include_headers=True, headers=None):
+        """
+        Parameters
+        ----------
+        source : str or pyarrow.Table
+            name of the file, or a pyarrow Table or RecordBatch.
+        usecols : list of int or str, optional
+            the columns which are rendered, as indices or names. The default is all columns.
+        rows : tuple of int, optional
+            the range (start, stop) of the rows which are rendered. The default is all rows.
+        include_headers : bool, optional
+            Whether or not the column names are included as headers. The default is True.
+        headers : list of strings, optional
+            If provided, these overwrite the column names as the headers. The default is None.
+
+        Raises
+        ------
+        ValueError
+            If the number of headers does not match the number of columns.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.source = source
+        self.__reader__ = None
+        self.__pid__ = None
+        names = self.__schema__().names
+        self.usecols = names if usecols is None else [names[c] if isinstance(c, int) else c for c in usecols]
+        if(headers is None):
+            headers = list(self.usecols)
+        elif(len(headers) != len(self.usecols)):
+            raise ValueError("Number of given headers does not match number of columns")
+        super().__init__(len(self.usecols), headers)
+        self.set_include_headers(include_headers)
+        self.rows = rows
+        self.__layout__()
+    
+    def __open_source__(self):
+        """
+        Opens the source, once in every process (readers are not shared with forked workers). Returns a ParquetFile,
+        a RecordBatchFileReader or a Table.
+        """
+        if(self.__reader__ is None or self.__pid__ != os.getpid()):
+            import pyarrow as pa
+            source = self.source
+            if(isinstance(source, pa.RecordBatch)):
+                source = pa.Table.from_batches([source])
+            elif(isinstance(source, (str, os.PathLike))):
+                fname = os.fspath(source)
+                if(os.path.splitext(fname)[1].lower() in (".parquet", ".pq")):
+                    import pyarrow.parquet as pq
+                    source = pq.ParquetFile(fname, memory_map=True)
+                else:
+                    try:
+                        source = pa.ipc.open_file(pa.memory_map(fname))
+                    except pa.ArrowInvalid:
+                        try:
+                            source = pa.ipc.open_stream(pa.memory_map(fname)).read_all()
+                        except pa.ArrowInvalid:
+                            import pyarrow.feather as feather
+                            source = feather.read_table(fname, memory_map=True) #Feather V1
+            if(isinstance(source, pa.Table)):
+                self.__batches__ = source.to_batches()
+            self.__reader__ = source
+            self.__pid__ = os.getpid()
+        return self.__reader__
+    
+    def __schema__(self):
+        source = self.__open_source__()
+        return source.schema_arrow if hasattr(source, "schema_arrow") else source.schema
+    
+    def __layout__(self):
+        """
+        Determines the offsets of the pieces of the source and the number of rows in `rows`.
+        """
+        source = self.__open_source__()
+        if(hasattr(source, "read_row_group")):
+            sizes = [source.metadata.row_group(i).num_rows for i in range(source.num_row_groups)]
+        elif(hasattr(source, "get_batch")):
+            sizes = [source.get_batch(i).num_rows for i in range(source.num_record_batches)]
+        else:
+            sizes = [batch.num_rows for batch in self.__batches__]
+        self.__offsets__ = [0] + np.cumsum(sizes, dtype=np.int64).tolist()
+        start, stop = (0, self.__offsets__[-1]) if self.rows is None else self.rows
+        self.__start__ = min(max(0, start), self.__offsets__[-1])
+        self.nrows = max(0, min(stop, self.__offsets__[-1]) - self.__start__)
+    
+    def __piece__(self, i):
+        """
+        Reads piece `i` of the source, with only the requested columns.
+        """
+        source = self.__open_source__()
+        if(hasattr(source, "read_row_group")):
+            return source.read_row_group(i, columns=self.usecols)
+        if(hasattr(source, "get_batch")):
+            return source.get_batch(i).select(self.usecols)
+        return self.__batches__[i].select(self.usecols)
+    
+    def __read__(self, start, stop):
+        """
+        Yields the rows `start` to `stop` (counted from the start of `rows`) as pieces of the source.
+        """
+        offsets = self.__offsets__
+        start += self.__start__
+        stop += self.__start__
+        for i in range(max(0, bisect_right(offsets, start)-1), len(offsets)-1):
+            if(offsets[i] >= stop):
+                break
+            lo = max(start, offsets[i])
+            hi = min(stop, offsets[i+1])
+            if(hi > lo):
+                yield self.__piece__(i).slice(lo-offsets[i], hi-lo)
+    
+    def __shards__(self):
+        """
+        The shards are the pieces of the source, such that every worker reads and decodes its own pieces.
+        """
+        offsets = [min(max(0, offset-self.__start__), self.nrows) for offset in self.__offsets__]
+        return [(start, stop) for start, stop in zip(offsets[:-1], offsets[1:]) if stop > start]
+    
+    def __format_piece__(self, piece):
+        """
+        Formats the rows of a piece. Numeric columns without missing values are formatted as numpy arrays.
+        """
+        import pyarrow as pa
+        columns = []
+        for col in piece.columns:
+            if(col.null_count == 0 and (pa.types.is_integer(col.type) or pa.types.is_floating(col.type))):
+                columns.append(col.to_numpy())
+            else:
+                columns.append(col.to_pylist())
+        return self.__format_rows__(columns)
+    
+    def __format_shard__(self, shard):
+        lines = []
+        for piece in self.__read__(*shard):
+            lines += self.__format_piece__(piece)
+        return lines
+    
+    def __iter_blocks__(self):
+        """
+        Reads the pieces one by one and formats them in blocks of `chunksize` rows.
+        """
+        for piece in self.__read__(0, self.nrows):
+            for start in range(0, piece.num_rows, self.chunksize):
+                yield self.__format_piece__(piece.slice(start, self.chunksize))
+    
+    def __subset__(self, rows):
+        import copy
+        import pyarrow as pa
+        if(isinstance(rows, slice) and rows.step in (None, 1)):
+            pieces = list(self.__read__(rows.start, rows.stop))
+        else:
+            rows = np.arange(self.nrows)[rows] if isinstance(rows, slice) else np.asarray(rows)
+            pieces = []
+            for piece_start, piece_stop in self.__shards__():
+                selected = rows[np.searchsorted(rows, piece_start):np.searchsorted(rows, piece_stop)]
+                if(len(selected) > 0):
+                    piece = next(self.__read__(piece_start, piece_stop))
+                    pieces.append(piece.take(pa.array(selected-piece_start)))
+        pieces = [piece if isinstance(piece, pa.Table) else pa.Table.from_batches([piece]) for piece in pieces]
+        table = copy.copy(self)
+        if(len(pieces) == 0):
+            table.source = pa.schema([self.__schema__().field(name) for name in self.usecols]).empty_table()
+        else:
+            table.source = pa.concat_tables(pieces)
+        table.rows = None
+        table.__reader__ = None
+        table.__layout__()
+        return table
+    
+    def __position__(self, name):
+        return list(self.usecols).index(name)
+    
+    def __column__(self, by):
+        if(isinstance(by, int)):
+            by = self.usecols[by]
+        import pyarrow as pa
+        columns = [piece.column(by) for piece in self.__read__(0, self.nrows)]
+        return np.concatenate([col.to_numpy(zero_copy_only=False) if isinstance(col, pa.Array) else col.to_numpy() for col in columns])
+    
+    def __fingerprint__(self, h):
+        import pyarrow as pa
+        if(isinstance(self.source, (str, os.PathLike))):
+            #the file is identified by its size and modification time, rather than by reading all of it
+            stat = os.stat(self.source)
+            h.update(repr((os.path.abspath(self.source), stat.st_size, stat.st_mtime_ns)).encode())
+        else:
+            sink = pa.BufferOutputStream()
+            source = self.__open_source__()
+            with pa.ipc.new_stream(sink, source.schema) as writer:
+                writer.write_table(source)
+            h.update(sink.getvalue())
+        h.update(repr((self.usecols, self.rows)).encode())
+    
+    def close(self):
+        """
+        Closes the source file.
+        """
+        if(hasattr(self.__reader__, "close")):
+            self.__reader__.close()
+        self.__reader__ = None
+
+#formatters which can be referred to by name in `apply_settings` and batch manifests
+FORMATTERS = {
+    "str": str,
+    "int": lambda s: str(int(float(s))),
+    "float": lambda s: str(float(s)),
+}
+
+def apply_settings(table, settings):
+    """
+    Configures `table` from a dictionary of settings, as used by `convert_batch` and manifests.
+    The keys correspond to the setters of the table: 'columns', 'column_lines', 'header_lines',
+    'row_lines', 'longtable', 'chunksize', 'cache' (a directory, see `set_cache`), 'escape' (see `set_escape`),
+    'sample' (a dictionary of the arguments of `set_sample`), 'footers' (the aggregates, or a dictionary of the
+    arguments of `set_footers`), 'subtotals' (a dictionary of the arguments of `set_subtotals`), 'headers' and 'bold'
+    (see `set_headers`), 'header_levels' and 'header_rule' (see `set_header_levels`), 'styles' (a list of dictionaries
+    of the arguments of `Style`) and 'formatters'.
+    Formatters are given by name (see `FORMATTERS`), as format specifications such as ".2f" or as
+    dictionaries of the options of a `Format`, either as a single value or a list with one value per column.
+    Other keys are ignored.
+    """
+    def formatter(fmt):
+        if(isinstance(fmt, dict)):
+            return Format(**fmt)
+        return FORMATTERS.get(fmt, fmt) if isinstance(fmt, str) else fmt
+    if("headers" in settings or "bold" in settings):
+        table.set_headers(settings.get("headers"), bold=settings.get("bold", False))
+    if("header_levels" in settings or "header_rule" in settings):
+        table.set_header_levels(settings.get("header_levels"), settings.get("header_rule", "cmidrule"))
+    if("columns" in settings):
+        table.set_columns(settings["columns"])
+    if("column_lines" in settings):
+        table.set_column_lines(settings["column_lines"])
+    if("header_lines" in settings):
+        table.set_header_lines(settings["header_lines"])
+    if("row_lines" in settings):
+        table.set_row_lines(settings["row_lines"])
+    if("longtable" in settings):
+        table.set_longtable(settings["longtable"])
+    if("chunksize" in settings):
+        table.set_chunksize(settings["chunksize"])
+    if("cache" in settings):
+        table.set_cache(settings["cache"])
+    if("escape" in settings):
+        table.set_escape(settings["escape"])
+    if("sample" in settings):
+        table.set_sample(**settings["sample"])
+    if("footers" in settings):
+        footers = settings["footers"]
+        if(isinstance(footers, dict)):
+            table.set_footers(**footers)
+        else:
+            table.set_footers(footers)
+    if("subtotals" in settings):
+        table.set_subtotals(**settings["subtotals"])
+    if("styles" in settings):
+        table.set_styles(*[Style(**style) if isinstance(style, dict) else style for style in settings["styles"]])
+    if("formatters" in settings):
+        fmt = settings["formatters"]
+        table.set_formatters([formatter(f) for f in fmt] if isinstance(fmt, (tuple, list)) else formatter(fmt))
+
+def _convert_job(job):
+    """
+    Converts a single file of a batch. Returns a summary of the conversion; errors are reported, not raised.
+    """
+    t0 = time.perf_counter()
+    summary = {"input": job["input"], "output": job["output"]}
+    table = None
+    try:
+        ncols = job.get("ncols")
+        header = job.get("header", False)
+        if(os.path.splitext(job["input"])[1].lower() in ARROW_EXTENSIONS + (".npy", ".npz")):
+            table = LaTeXTable(job["input"], usecols=job.get("usecols"), rows=job.get("rows"))
+        else:
+            if(ncols is None and not header):
+                with open(job["input"]) as f:
+                    ncols = len(next(csv.reader(f, **job.get("csv", dict()))))
+            table = CSVToLaTeX(job["input"], ncols=ncols, header=header, numeric=job.get("numeric", False), **job.get("csv", dict()))
+        apply_settings(table, job)
+        table.tolatex(job["output"])
+        summary.update(status="ok", rows=table.stats.get("rows", 0), cached=table.stats.get("cache") == "hit")
+    except Exception as e:
+        summary.update(status="failed", error="{}: {}".format(type(e).__name__, e))
+    finally:
+        if(table is not None):
+            table.close()
+    summary["time"] = time.perf_counter()-t0
+    return summary
+
+def convert_batch(sources, outdir=None, workers=None, processes=False, **settings):
+    """
+    Converts many csv files to LaTeX tables concurrently.
+
+    Parameters
+    ----------
+    sources : str or list
+        glob patterns of csv files, JSON manifest files (ending in '.json') and/or dictionaries
+        describing a single table. A table description contains the key 'input' (the csv file) and optionally
+        'output' (the tex file), 'ncols', 'header', 'numeric' (see `CSVToLaTeX`), 'csv' (arguments of csv.reader)
+        and the keys of `apply_settings`. Parquet, Feather, Arrow and numpy files (see `LaTeXTable`) are converted
+        as well, their description can contain 'usecols' and 'rows' (see `ArrowToLaTeX`).
+        A manifest contains a list of table descriptions, or a dictionary with such a list under 'tables'
+        and settings shared by these tables under 'defaults'. Relative paths in a manifest are relative to the manifest.
+    outdir : str, optional
+        directory of the output files which are not given explicitly. By default, a tex file is written next to each csv file.
+    workers : int, optional
+        number of threads or processes. The default is None, which lets `concurrent.futures` decide.
+    processes : bool, optional
+        if True, the files are converted in a process pool instead of a thread pool, which is faster for
+        expensive formatters. Formatters must then be given by name or format specification. The default is False.
+    **settings : key-value arguments
+        settings which apply to all tables, unless a table description overrides them.
+        If neither 'ncols' nor 'header' is given, the number of columns is inferred from the first row.
+
+    Returns
+    -------
+    list of dict
+        a summary per table with the keys 'input', 'output', 'status' ('ok' or 'failed'), 'time' and
+        'rows' and 'cached' or 'error'. Files which fail to convert are skipped, they do not abort the batch.
+        A file or pattern which matches no files is reported as a failed table as well.
+
+    """
+    import glob
+    import json
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    if(isinstance(sources, (str, dict))):
+        sources = [sources]
+    jobs = []
+    for source in sources:
+        if(isinstance(source, dict)):
+            jobs.append(dict(settings, **source))
+        elif(source.endswith(".json")):
+            with open(source) as f:
+                manifest = json.load(f)
+            if(isinstance(manifest, dict)):
+                defaults = dict(settings, **manifest.get("defaults", dict()))
+                manifest = manifest["tables"]
+            else:
+                defaults = settings
+            root = os.path.dirname(source)
+            for table in manifest:
+                job = dict(defaults, **table)
+                job["input"] = os.path.join(root, job["input"])
+                if("output" in job):
+                    job["output"] = os.path.join(root, job["output"])
+                jobs.append(job)
+        else:
+            #a source which matches no files is kept, so that it is reported as failed
+            jobs += [dict(settings, input=fname) for fname in sorted(glob.glob(source)) or [source]]
+    for job in jobs:
+        if("output" not in job):
+            output = os.path.splitext(job["input"])[0] + ".tex"
+            job["output"] = output if outdir is None else os.path.join(outdir, os.path.basename(output))
+    if(outdir is not None):
+        os.makedirs(outdir, exist_ok=True)
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(workers) as pool:
+        return list(pool.map(_convert_job, jobs))
+
+def main(args=None):
+    """
+    Command line interface, see `python ToLaTeXTable.py --help`. A single file is converted with
+    `python ToLaTeXTable.py in.csv -o out.tex --cols l c c --fmt str .2f .2f`, where `-o -` writes the table to stdout.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert csv files to LaTeX tables.")
+    parser.add_argument("inputs", nargs="+", help="csv files, glob patterns or JSON manifests (see convert_batch)")
+    parser.add_argument("-o", "--output", help="tex file of a single input, or - to write the table to stdout")
+    parser.add_argument("-d", "--outdir", help="directory of the tex files (default: next to the csv files)")
+    parser.add_argument("-j", "--workers", type=int, help="number of files converted concurrently")
+    parser.add_argument("--processes", action="store_true", help="use processes instead of threads")
+    parser.add_argument("--ncols", type=int, help="number of columns (inferred from the first row by default)")
+    parser.add_argument("--header", action="store_true", help="the first row of the csv files contains the headers")
+    parser.add_argument("--numeric", action="store_true", help="fast mode for purely numeric csv files (see CSVToLaTeX)")
+    parser.add_argument("--cols", nargs="+", dest="columns", help="column types, e.g. 'l c c' or 'l|cc'")
+    parser.add_argument("--fmt", nargs="+", dest="formatters",
+                        help="formatter names (" + ", ".join(FORMATTERS) + ") or format specifications such as .2f, one for all or one per column")
+    parser.add_argument("--lines", nargs="+", dest="row_lines",
+                        help="rows after which a line is added ('all', 'none' or row indices, -1 for the end of the table)")
+    parser.add_argument("--longtable", action="store_true", help="use a longtable instead of a tabular")
+    parser.add_argument("--cache", help="cache directory; tables whose input and settings did not change are not rendered again")
+    parser.add_argument("--footers", nargs="+", choices=list(AGGREGATES), help="footer rows with aggregates of the columns")
+    parser.add_argument("--escape", action="store_true", help="escape LaTeX special characters such as & and _ (formulas between $ are kept)")
+    args = parser.parse_args(args)
+    if(args.output is not None and (len(args.inputs) != 1 or args.outdir is not None)):
+        parser.error("-o/--output requires a single input and no --outdir")
+
+    settings = {"header": args.header, "numeric": args.numeric, "longtable": args.longtable}
+    if(args.ncols is not None):
+        settings["ncols"] = args.ncols
+    if(args.cache is not None):
+        settings["cache"] = args.cache
+    if(args.escape):
+        settings["escape"] = True
+    if(args.footers is not None):
+        settings["footers"] = args.footers
+    if(args.columns is not None):
+        settings["columns"] = args.columns[0] if len(args.columns)==1 else args.columns
+    if(args.formatters is not None):
+        settings["formatters"] = args.formatters[0] if len(args.formatters)==1 else args.formatters
+    if(args.row_lines is not None):
+        settings["row_lines"] = args.row_lines[0] if args.row_lines[0] in ("all", "none") else [int(r) for r in args.row_lines]
+    inputs, log = args.inputs, sys.stdout
+    if(args.output == "-"):
+        inputs, log = [{"input": args.inputs[0], "output": sys.stdout}], sys.stderr
+    elif(args.output is not None):
+        inputs = [{"input": args.inputs[0], "output": args.output}]
+    summary = convert_batch(inputs, outdir=args.outdir, workers=args.workers, processes=args.processes and log is sys.stdout, **settings)
+    for table in summary:
+        if(table["status"] == "ok"):
+            print("{:<40s} {:>10s} {:>9.3f} s".format(table["input"], "cached" if table["cached"] else "{:d} rows".format(table["rows"]), table["time"]), file=log)
+        else:
+            print("{:<40s} failed: {}".format(table["input"], table["error"]), file=sys.stderr)
+    failed = sum(table["status"] != "ok" for table in summary)
+    print("{:d} tables converted, {:d} failed".format(len(summary)-failed, failed), file=log)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the converters of ToLaTeXTable.
+
+Every combination of converter, number of rows, number of columns, formatter type and
+row line setting is timed. For each case the throughput (rows/s and output bytes/s) and the
+peak memory usage (measured with tracemalloc in a separate run) are reported.
+The results can be saved as JSON and compared to a previous run to spot regressions:
+
+    python benchmark.py --rows 100 10000 1000000 --output new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from ToLaTeXTable import CSVToLaTeX, MatrixToLaTeX, DataFrameToLaTeX, ListToLaTeX, Format
+
+CONVERTERS = ["csv", "matrix", "dataframe", "list"]
+FORMATTERS = {
+    "str": str,
+    "spec": ".2f",
+    "lambda": lambda s: "{:.2f}".format(float(s)),
+    "format": Format(precision=2, bold_if=lambda v: v > 900),
+}
+LINES = {
+    "none": "none",
+    "all": "all",
+    "every10": None, #a line after every 10th row, filled in per table size
+}
+
+def make_data(rows, cols, workdir):
+    """
+    Creates a random dataset of `rows` x `cols` and the inputs of all converters.
+    The csv file is cached in `workdir`.
+    """
+    data = np.random.default_rng(0).random((rows, cols))*1000
+    fname = os.path.join(workdir, "bench_{:d}x{:d}.csv".format(rows, cols))
+    if(not os.path.exists(fname)):
+        np.savetxt(fname, data, delimiter=",", fmt="%.6f")
+    return {
+        "csv": lambda: CSVToLaTeX(fname, ncols=cols),
+        "matrix": lambda: MatrixToLaTeX(data),
+        "dataframe": lambda: DataFrameToLaTeX(pd.DataFrame(data), include_index=False),
+        "list": lambda: ListToLaTeX(data.tolist(), cols, has_headers=False),
+    }
+
+def run_case(factory, fmt, lines, rows, outfile, memory=True, repeat=1):
+    """
+    Renders the table created by `factory` `repeat` times and returns the fastest run.
+    If `memory` is True, the table is rendered once more while tracing the memory allocations.
+    Only the rendering is measured: the table (e.g. the DataFrame or the list of rows) is created before.
+    """
+    def create():
+        table = factory()
+        table.set_formatters(FORMATTERS[fmt])
+        table.set_row_lines(list(range(9, rows, 10)) if lines == "every10" else LINES[lines])
+        return table
+    def close(table):
+        if(isinstance(table, CSVToLaTeX)):
+            table.close()
+    best = float("inf")
+    for _ in range(repeat):
+        table = create()
+        t0 = time.perf_counter()
+        table.tolatex(outfile)
+        best = min(best, time.perf_counter()-t0)
+        close(table)
+    result = {
+        "time": best,
+        "rows_per_second": rows/best,
+        "bytes_per_second": os.path.getsize(outfile)/best,
+        "output_bytes": os.path.getsize(outfile),
+    }
+    if(memory):
+        table = create()
+        tracemalloc.start()
+        table.tolatex(outfile)
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        close(table)
+    return result
+
+def compare(results, baseline, threshold):
+    """
+    Prints the change in throughput of every case that is also present in `baseline`.
+    Cases that are more than `threshold` (a fraction) slower are marked as regressions.
+    Returns the number of regressions.
+    """
+    old = {case["name"]: case for case in baseline["cases"] if "rows_per_second" in case}
+    regressions = 0
+    for case in results["cases"]:
+        if(case["name"] not in old or "rows_per_second" not in case):
+            continue
+        ratio = case["rows_per_second"]/old[case["name"]]["rows_per_second"]
+        marker = ""
+        if(ratio < 1-threshold):
+            marker = "  REGRESSION"
+            regressions += 1
+        print("{:<45s} {:>8.2f}x{}".format(case["name"], ratio, marker))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ToLaTeXTable converters.")
+    parser.add_argument("--rows", type=float, nargs="+", default=[1e2, 1e3, 1e4, 1e5],
+                        help="row counts to benchmark (e.g. 1e2 1e7)")
+    parser.add_argument("--cols", type=int, nargs="+", default=[5, 20], help="column counts to benchmark")
+    parser.add_argument("--converters", nargs="+", default=CONVERTERS, choices=CONVERTERS)
+    parser.add_argument("--formatters", nargs="+", default=list(FORMATTERS), choices=list(FORMATTERS))
+    parser.add_argument("--lines", nargs="+", default=list(LINES), choices=list(LINES))
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs per case; the fastest is reported")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slower) peak memory measurement")
+    parser.add_argument("--output", help="file to which the results are saved as JSON")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown which is reported as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        outfile = os.path.join(workdir, "out.tex")
+        for rows in map(int, args.rows):
+            for cols in args.cols:
+                factories = make_data(rows, cols, workdir)
+                for converter in args.converters:
+                    for fmt in args.formatters:
+                        for lines in args.lines:
+                            name = "{}/{:d}x{:d}/{}/{}".format(converter, rows, cols, fmt, lines)
+                            case = {"name": name, "converter": converter, "rows": rows, "cols": cols,
+                                    "formatter": fmt, "lines": lines}
+                            try:
+                                case.update(run_case(factories[converter], fmt, lines, rows, outfile,
+                                                     memory=not args.no_memory, repeat=args.repeat))
+                                print("{:<45s} {:>12,.0f} rows/s {:>8.1f} MB/s {:>9s}".format(name, case["rows_per_second"],
+                                      case["bytes_per_second"]/1e6, "{:.1f} MB".format(case["peak_memory"]/1e6) if "peak_memory" in case else ""))
+                            except Exception as e:
+                                case["error"] = repr(e)
+                                print("{:<45s} failed: {}".format(name, case["error"]))
+                            results["cases"].append(case)
+
+    if(args.output):
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    if(args.compare):
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if(compare(results, baseline, args.threshold) > 0):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of ToLaTeXTable, run with `python -m pytest`.
+"""
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ToLaTeXTable import CSVToLaTeX, DataFrameToLaTeX, ListToLaTeX, MatrixToLaTeX, Style, TableCache
+
+def test_styles_of_generator_rows():
+    rows = ([i, 2*i] for i in range(5))
+    table = ListToLaTeX(rows, 2, has_headers=False)
+    table.set_styles(Style("max"))
+    assert table.to_string() == ("\\begin{tabular}{cc}\n0 & 0\\\\\n1 & 2\\\\\n2 & 4\\\\\n3 & 6\\\\\n"
+                                 "\\textbf{4} & \\textbf{8}\\\\\n\\end{tabular}")
+
+def test_blank_csv_lines(tmp_path):
+    fname = tmp_path / "blank.csv"
+    fname.write_text("a,b\n1,2\n\n3,4\n\n")
+    for numeric in (False, True):
+        for workers in (1, 2):
+            table = CSVToLaTeX(str(fname), header=True, numeric=numeric)
+            table.chunksize = 1
+            assert table.to_string(workers=workers) == ("\\begin{tabular}{cc}\n\\hline\na & b\\\\\n\\hline\n"
+                                                        "1 & 2\\\\\n3 & 4\\\\\n\\end{tabular}")
+            table.close()
+
+def test_quoted_line_breaks(tmp_path):
+    fname = tmp_path / "quoted.csv"
+    fname.write_text('a,b\n1,"x\ny"\n2,p\n3,q\n4,"u\nv"\n5,w\n')
+    table = CSVToLaTeX(str(fname), header=True)
+    table.set_sample(head=2, tail=2)
+    assert table.to_string() == ("\\begin{tabular}{cc}\n\\hline\na & b\\\\\n\\hline\n1 & x\ny\\\\\n2 & p\\\\\n"
+                                 "$\\vdots$ & $\\vdots$\\\\\n4 & u\nv\\\\\n5 & w\\\\\n\\end{tabular}")
+    table.set_sample()
+    table.chunksize = 1
+    with pytest.raises(ValueError):
+        table.to_string(workers=2)
+    table.close()
+
+def test_footers_of_empty_table():
+    table = MatrixToLaTeX(np.zeros((0, 2)))
+    table.set_footers(["sum", "count"])
+    assert table.to_string() == "\\begin{tabular}{cc}\n\\hline\nSum & \\\\\nCount & 0\\\\\n\\end{tabular}"
+
+def test_footers_of_csv_formatters(tmp_path):
+    fname = tmp_path / "values.csv"
+    fname.write_text("a,b\nx,1\ny,22\n")
+    table = CSVToLaTeX(str(fname), header=True)
+    table.set_formatters([str, lambda s: s.zfill(3)])
+    table.set_footers("sum")
+    assert table.to_string() == ("\\begin{tabular}{cc}\n\\hline\na & b\\\\\n\\hline\nx & 001\\\\\ny & 022\\\\\n"
+                                 "\\hline\nSum & 023\\\\\n\\end{tabular}")
+    table.close()
+
+def test_footers_of_ragged_rows():
+    table = ListToLaTeX([["a", 1, 2], ["b", 3], ["c", 5, 6]], 3, has_headers=False)
+    table.set_footers(["count", "sum"])
+    assert table.to_string() == ("\\begin{tabular}{ccc}\na & 1 & 2\\\\\nb & 3 & \\\\\nc & 5 & 6\\\\\n\\hline\n"
+                                 "Count & 3 & 2\\\\\nSum & 9 & 8\\\\\n\\end{tabular}")
+
+def test_styles_of_ragged_rows():
+    table = ListToLaTeX([[1, 2], [7], [5, 6]], 2, has_headers=False)
+    table.set_styles(Style("max"))
+    assert table.to_string() == ("\\begin{tabular}{cc}\n1 & 2\\\\\n\\textbf{7} & \\\\\n5 & \\textbf{6}\\\\\n"
+                                 "\\end{tabular}")
+
+def test_cancelled_atolatex():
+    def slow(value):
+        time.sleep(0.2)
+        return str(value)
+    table = ListToLaTeX([[i] for i in range(10)], 1, has_headers=False)
+    table.set_formatters([slow])
+    table.set_chunksize(2)
+    async def cancel():
+        task = asyncio.ensure_future(table.atolatex(io.StringIO()))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await task
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+
+def test_index_spans_of_subtotals_and_parts(tmp_path):
+    index = pd.MultiIndex.from_tuples([("g1", 1), ("g1", 2), ("g2", 1), ("g2", 1)], names=["g", "k"])
+    df = pd.DataFrame({"v": [1, 2, 3, 4]}, index=index)
+    table = DataFrameToLaTeX(df)
+    table.set_subtotals(by=1)
+    assert table.to_string() == ("\\begin{tabular}{ccc}\n\\hline\ng & k & v\\\\\n\\hline\n"
+                                 "g1 & 1 & 1\\\\\n & Sum 1 & 1\\\\\ng1 & 2 & 2\\\\\n & Sum 2 & 2\\\\\n"
+                                 "\\multirow{2}{*}{g2} & 1 & 3\\\\\n & 1 & 4\\\\\n & Sum 1 & 7\\\\\n\\end{tabular}")
+    parts = DataFrameToLaTeX(df).tolatex_parts(str(tmp_path / "table"), 3)
+    with open(parts[1]["file"]) as f:
+        assert "g2 & 1 & 4" in f.read()
+
+def test_cache_concurrent_writers(tmp_path):
+    cache = TableCache(str(tmp_path))
+    barrier = threading.Barrier(4)
+    def write(i):
+        with cache.writer("table") as f:
+            barrier.wait()
+            f.write("rows\n"*1000)
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(write, range(4)))
+    with open(cache.get("table")) as f:
+        assert f.read() == "rows\n"*1000
+    assert [path.name for path in tmp_path.iterdir()] == ["table.tex"]
+
+def test_subtotals_and_footers():
+    table = ListToLaTeX([["a", "x", 1, 2.5], ["a", "y", 3, 0.5], ["b", "x", 5, 1.0]], 4, has_headers=False)
+    table.set_subtotals(by=0, aggregates=["sum", "max"])
+    table.set_footers(["sum", "mean"], label_column=1)
+    assert table.to_string() == ("\\begin{tabular}{cccc}\na & x & 1 & 2.5\\\\\na & y & 3 & 0.5\\\\\n"
+                                 "Sum a &  & 4 & 3.0\\\\\nMax a &  & 3 & 2.5\\\\\nb & x & 5 & 1.0\\\\\n"
+                                 "Sum b &  & 5 & 1.0\\\\\nMax b &  & 5 & 1.0\\\\\n\\hline\n"
+                                 " & Sum & 9 & 4.0\\\\\n & Mean & 3.0 & 1.3333333333333333\\\\\n\\end{tabular}")
+
+def test_workers_match_serial(tmp_path):
+    data = np.random.default_rng(0).random((50, 3))*100
+    fname = str(tmp_path / "data.csv")
+    np.savetxt(fname, data, delimiter=",", fmt="%.3f")
+    factories = [lambda: MatrixToLaTeX(data), lambda: DataFrameToLaTeX(pd.DataFrame(data)),
+                 lambda: ListToLaTeX(data.tolist(), 3, has_headers=False),
+                 lambda: CSVToLaTeX(fname, ncols=3), lambda: CSVToLaTeX(fname, ncols=3, numeric=True)]
+    for factory in factories:
+        tables = [factory(), factory()]
+        for table in tables:
+            table.set_chunksize(7)
+            table.set_formatters(".1f")
+            table.set_footers("sum")
+        assert tables[0].to_string() == tables[1].to_string(workers=2)
+
+def test_numeric_csv_matches_reader(tmp_path):
+    fname = str(tmp_path / "data.csv")
+    np.savetxt(fname, np.arange(20).reshape(10, 2)/4, delimiter=",", fmt="%g")
+    for formatters in (str, ".2f"):
+        tables = [CSVToLaTeX(fname, ncols=2), CSVToLaTeX(fname, ncols=2, numeric=True)]
+        for table in tables:
+            table.set_formatters(formatters)
+        assert tables[0].to_string() == tables[1].to_string()
+        for table in tables:
+            table.close()
+
+def test_cache(tmp_path):
+    output = str(tmp_path / "table.tex")
+    table = MatrixToLaTeX(np.arange(6).reshape(3, 2))
+    table.set_cache(str(tmp_path / "cache"))
+    table.tolatex(output)
+    assert table.stats["cache"] == "miss"
+    with open(output) as f:
+        rendered = f.read()
+    table.tolatex(output)
+    assert table.stats["cache"] == "hit"
+    table.set_formatters(".1f")
+    table.tolatex(output)
+    assert table.stats["cache"] == "miss"
+    with open(output) as f:
+        assert f.read() != rendered